@@ -3,107 +3,93 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import re
-
-class IterationEngine:
+import os
+import functools
+import glob
+import time
+
+from convergence_engine import core
+from convergence_engine.core import compile_expression, parse_parameters
+from convergence_engine.precision import BACKENDS, DEFAULT_DIGITS
+from convergence_engine.rootfinding import choose_map
+from convergence_engine.sampling import CurveSampler
+from convergence_engine.fixedpoints import find_fixed_points
+from convergence_engine.basins import basin_map
+from convergence_engine.store import RunStore
+from convergence_engine.export import FORMATS, export_bytes
+from convergence_engine.cache import RunCache
+from convergence_engine.convergence import row_styles
+from convergence_engine.sandbox import Budget, EvaluationTimeout, GuardedExecutor, WorkersBusy
+from convergence_engine.systems import SystemEngine
+from convergence_engine.checkpoint import load_checkpoint, save_checkpoint
+
+RUNS_DIR = "runs"
+# Set to a directory to keep cached runs across restarts.
+RUN_CACHE_DIR = os.environ.get("FPI_RUN_CACHE_DIR")
+STORE_PAGE_ROWS = 1000
+
+FIXED_POINT_STYLES = [("attracting", "#10B981", "circle"), ("repelling", "#EF4444", "x"), ("neutral", "#FACC15", "square")]
+
+# Coarse curve kept loaded this many view widths either side for panning.
+PAN_MARGIN = 10
+
+# Bounds on one in-memory Run Auto click, which runs on the server thread. The
+# budget is cooperative (checked between steps), so it is kept short.
+RUN_BUDGET = Budget(run_seconds=10.0)
+# Persisted runs (up to 1e8 steps) and basin maps run in worker processes that
+# are killed past their time limit.
+JOB_WORKERS = 2
+PERSISTED_RUN_SECONDS = 300.0
+WORKER_GRACE_SECONDS = 5.0
+BASIN_TIMEOUT = 120.0
+# How long a job waits for a free worker before the user is told they are busy.
+QUEUE_SECONDS = 5.0
+
+class IterationEngine(core.IterationEngine):
+    """
+    core.IterationEngine with the web app's rules: Run Auto goes up to
+    max_iter steps further (after a budget pause: up to max_iter steps in
+    all), in-memory runs have RUN_BUDGET, persisted runs can run in a
+    worker process, and the cobweb history is only a plotting tail.
+    """
     def __init__(self):
-        self.g_str = ""
-        self.history = []        
-        self.previous_x = 0.0
-        self.total_steps = 0     
-
-    def initialize(self, func_str, x0):
-        self.g_str = func_str
-        self.history = []
-        self.total_steps = 0 
-        try:
-            self.previous_x = float(x0)
-            val = self.evaluate_g(self.previous_x)
-            if np.isnan(val) or np.iscomplex(val):
-                return False, "DomainError: Initial guess results in an undefined value."
-            return True, ""
-        except Exception as e:
-            return False, e
-
-    def evaluate_g(self, x):
-        safe_dict = {
-            "x": x,
-            "np": np,
-            "cos": np.cos, "sin": np.sin, "tan": np.tan,
-            "sqrt": np.sqrt, "log": np.log, "exp": np.exp,
-            "abs": np.abs, "pi": np.pi, "e": np.e
-        }
-        with np.errstate(all='ignore'):
-            try:
-                result = eval(self.g_str, {"__builtins__": {}}, safe_dict)
-                return result
-            except NameError as e:
-                raise NameError(e)
-            except Exception as e:
-                raise e
+        super().__init__()
+        self.budget = RUN_BUDGET
 
     def step(self):
-        try:
-            x_in = self.previous_x
-            
-            if abs(x_in) > 1e100: 
-                return {"error_msg": "OverflowError: Values are too large (Divergence)"}
-
-            try:
-                x_out = self.evaluate_g(x_in)
-            except OverflowError:
-                return {"error_msg": "OverflowError: Calculation exceeded limits."}
-            except Exception as e:
-                return {"error_msg": f"Calculation Error: {str(e)}"}
-            
-            if np.isinf(x_out) or abs(x_out) > 1e100:
-                 return {"error_msg": "OverflowError: Result exploded to Infinity."}
-
-            if np.isnan(x_out) or np.iscomplex(x_out):
-                return {"error_msg": "DomainError: Result is not a real number."}
-
-            if x_out == 0:
-                error_pct = 0.0 if x_in == 0 else 100.0
-            else:
-                error_pct = abs((x_out - x_in) / x_out) * 100
-            
-            if len(self.history) > 500:
-                self.history.pop(0)
-            self.history.append((x_in, x_out))
-            
-            self.previous_x = x_out
-            self.total_steps += 1 
-
-            if abs(x_out) < 1e-15 and abs(x_in) < 1e-15:
-                error_pct = 0.0
-            
-            return {
-                "step": self.total_steps, 
-                "x_in": x_in,
-                "x_out": x_out,
-                "error": error_pct
-            }
-        except Exception as e:
-            return {"error_msg": str(e)}
-
-    def run_auto(self, tolerance, max_iter):
+        step_data = super().step()
+        if len(self.history) > 2 * core.HISTORY_LIMIT:
+            del self.history[:-core.HISTORY_LIMIT]
+        return step_data
+
+    def _target(self, max_iter):
+        return max_iter if self.stop_reason == "budget" else self.step_count + max_iter
+
+    def run_auto(self, tolerance, max_iter, keep_results=True):
+        return super().run_auto(tolerance, self._target(max_iter), keep_results)
+
+    def run_in_worker(self, tolerance, max_iter, executor):
+        """
+        Run Auto for a persisted run, in one of executor's worker processes,
+        which is killed if it overruns. The store is handed over through a
+        checkpoint and reattached afterwards; if the worker fails or is
+        killed, the run is back at that checkpoint.
+        """
+        target = self._target(max_iter)
+        checkpoint = self.checkpoint()
+        path = self.store.path
+        self.store.close()
+        self.store = None
         results = []
-        for _ in range(max_iter):
-            res = self.step()
-            if "error_msg" in res:
-                results.append(res)
-                break
-            results.append(res)
-            
-            is_converged = res["error"] < tolerance
-            is_zero = abs(res["x_out"]) < 1e-15
-            
-            if (is_converged or is_zero) and res["step"] > 1:
-                break    
+        try:
+            checkpoint, results = executor.run(core.run_from_checkpoint, checkpoint, tolerance, target,
+                                               Budget(run_seconds=PERSISTED_RUN_SECONDS, operations=float("inf")),
+                                               timeout=PERSISTED_RUN_SECONDS + WORKER_GRACE_SECONDS,
+                                               queue_timeout=QUEUE_SECONDS)
+        finally:
+            self.resume(checkpoint, RunStore.open(path, writable=True))
         return results
 
-    def g_func(self, val):
-        return self.evaluate_g(val)
-
 
 def process_math_input(user_input):
     if not user_input: return ""
@@ -141,6 +127,42 @@ def validate_inputs(func, x0, tol):
     except: return False, "Tolerance must be a valid number."
     return True, ""
 
+def parse_tolerance(tol):
+    try: return float(tol)
+    except: return 1e-4
+
+def highlight_converged(frame, tol):
+    # Whole table at once: one mask over the columns, not a call per row.
+    styles = row_styles(pd.to_numeric(frame['Error (%)'], errors='coerce').to_numpy(float),
+                        frame['Iteration'].to_numpy(), tol, 'background-color: rgba(52, 211, 153, 0.25)')
+    return pd.DataFrame(np.repeat(styles[:, None], frame.shape[1], axis=1), index=frame.index, columns=frame.columns)
+
+
+@st.cache_resource
+def get_job_executor():
+    # Basin maps and persisted runs, shared by every session. Workers come from a
+    # fork server (sandbox.START_METHOD), so they never hold this server's client sockets.
+    return GuardedExecutor(workers=JOB_WORKERS)
+
+
+def open_saved_run(path):
+    # One read-only map per session, reused across reruns; reopened when the run's
+    # metadata changes (it is still being written) and closed when another source is picked.
+    key = (path, os.path.getmtime(path + ".json")) if path else None
+    cached = st.session_state.get("saved_store")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    st.session_state.saved_store = (key, RunStore.open(path)) if path else None
+    return st.session_state.saved_store[1] if path else None
+
+
+@st.cache_resource
+def get_run_cache():
+    # Shared by every session, so repeated classroom configurations are computed once.
+    return RunCache(RUN_CACHE_DIR)
+
 
 st.set_page_config(page_title="Convergence Engine", page_icon="🕸️", layout="wide")
 
@@ -229,16 +251,22 @@ if 'engine' not in st.session_state: st.session_state.engine = IterationEngine()
 if 'initialized' not in st.session_state: st.session_state.initialized = False
 if 'history_df' not in st.session_state: st.session_state.history_df = pd.DataFrame(columns=["Iteration", "Previous X", "Current X", "Error (%)"])
 if 'runtime_error' not in st.session_state: st.session_state.runtime_error = None
+if 'view_range' not in st.session_state: st.session_state.view_range = None
+if 'last_box' not in st.session_state: st.session_state.last_box = None
 
 with st.sidebar:
     st.header("⚙️ Configuration")
-    g_func_raw = st.text_input("Function g(x):", value="cos(x)")
+    solve_root = st.toggle("Solve f(x) = 0", value=False, help="ON: enter f(x); the fastest-contracting g(x) is generated for you.")
+    g_func_raw = st.text_input("Function f(x):" if solve_root else "Function g(x):", value="cos(x) - x" if solve_root else "cos(x)")
+    params_input = st.text_input("Parameters:", value="", placeholder="e.g. a=2, b=0.5",
+                                 help="Named constants used in the function, e.g. `a*cos(x) + b`.")
     x0_input = st.text_input("Initial Guess ($x_0$):", value="0.5")
     tol_input = st.text_input("Tolerance:", value="0.0001")
     
     st.markdown("---")
     st.subheader("👁️ Visuals")
     show_cobweb = st.toggle("Show Cobweb Path", value=True)
+    show_fixed = st.toggle("Mark Fixed Points", value=True, help="Every fixed point of g in the plotted range, classified by |g'(x*)|.")
     auto_focus = st.toggle("Camera: Follow Steps", value=True, help="ON: Auto-zooms to new points.\nOFF: Static view.")
 
     with st.expander("📚 Math Syntax Guide"):
@@ -252,8 +280,38 @@ with st.sidebar:
         """)
 
     with st.expander("🛠️ Limits"):
-        max_iter_input = st.number_input("Max Iterations:", value=100, min_value=1, max_value=100000, step=10)
-        decimals = st.slider("Decimals:", 0, 15, 6)
+        persist_run = st.toggle("Persist run to disk", value=False,
+                                help=f"Streams every step to a memory-mapped file in `{RUNS_DIR}/`, so long runs keep their full history without growing RAM.")
+        max_iter_input = st.number_input("Max Iterations:", value=100, min_value=1,
+                                         max_value=100_000_000 if persist_run else 100000, step=10)
+        precision_input = st.selectbox("Number Backend:", BACKENDS, index=0,
+                                       help="float64: fastest.\nlongdouble: extended precision.\nmpmath: arbitrary digits.\nadaptive: float64 first, mpmath for the final digits.")
+        checkpoints = sorted(glob.glob(os.path.join(RUNS_DIR, "*.fpi.ckpt")), reverse=True)
+        if checkpoints:
+            r1, r2 = st.columns([3, 1])
+            resume_path = r1.selectbox("Saved run:", checkpoints, label_visibility="collapsed",
+                                       format_func=lambda p: os.path.basename(p)[:-len(".fpi.ckpt")])
+            if r2.button("Resume", use_container_width=True):
+                try:
+                    ckpt = load_checkpoint(resume_path)
+                    if st.session_state.engine.store is not None:
+                        st.session_state.engine.store.close()
+                    success, eng_msg = st.session_state.engine.resume(ckpt, RunStore.open(ckpt["store"], writable=True))
+                except (OSError, ValueError, KeyError) as e:
+                    success, eng_msg = False, e
+                if success:
+                    st.session_state.initialized = True
+                    st.session_state.runtime_error = None
+                    st.session_state.view_range = None
+                    tail = st.session_state.engine.store.tail(1)
+                    st.session_state.history_df = pd.DataFrame(tail).rename(columns={"step": "Iteration", "x_in": "Previous X", "x_out": "Current X", "error": "Error (%)"})
+                    st.toast(f"Resumed at iteration {st.session_state.engine.step_count:,}")
+                else:
+                    st.error(get_friendly_error_message(eng_msg))
+        digits_input = DEFAULT_DIGITS
+        if precision_input in ("mpmath", "adaptive"):
+            digits_input = st.number_input("Digits (max):", value=DEFAULT_DIGITS, min_value=16, max_value=1000, step=5)
+        decimals = st.slider("Decimals:", 0, 50 if precision_input in ("mpmath", "adaptive") else 20, 6)
 
     col_btn1, col_btn2 = st.columns(2)
     
@@ -268,10 +326,27 @@ with st.sidebar:
             try:
                 proc_func = process_math_input(g_func_raw)
                 compile(proc_func, "<string>", "eval") 
-                success, eng_msg = st.session_state.engine.initialize(proc_func, x0_input)
+                params = parse_parameters(params_input)
+                if solve_root:
+                    map_name, proc_func, map_rate = choose_map(proc_func, x0_input, params)
+                    if not np.isfinite(map_rate):
+                        raise ValueError("No candidate iteration map converges from this initial guess.")
+                    st.info(f"Iterating the **{map_name}** map (contraction ≈ {map_rate:.3g}).")
+                success, eng_msg = st.session_state.engine.initialize(proc_func, x0_input, precision_input, digits_input, params)
                 if success:
                     st.session_state.initialized = True
-                    st.session_state.history_df = pd.DataFrame([{"Iteration": 0, "Previous X": float(x0_input), "Current X": float(x0_input), "Error (%)": 0.0}])
+                    st.session_state.view_range = None
+                    if st.session_state.engine.store is not None:
+                        st.session_state.engine.store.close()
+                    store = None
+                    if persist_run:
+                        store = RunStore.create(os.path.join(RUNS_DIR, time.strftime("run-%Y%m%d-%H%M%S.fpi")),
+                                                expression=proc_func, x0=x0_input, params=params, precision=precision_input)
+                    st.session_state.engine.attach_store(store)
+                    x_start = st.session_state.engine.previous_x
+                    st.session_state.history_df = pd.DataFrame([{"Iteration": 0, "Previous X": x_start, "Current X": x_start, "Error (%)": 0.0}])
+                    if not st.session_state.engine.backend.resolves(tol_input):
+                        st.warning(f"Tolerance {tol_input}% is below what {precision_input} can resolve; runs will stop at its precision limit.")
                     st.toast(f"System Ready: x₀ = {x0_input}")
                 else:
                     st.error(get_friendly_error_message(eng_msg))
@@ -288,7 +363,9 @@ with st.sidebar:
     st.markdown("---")
     c1, c2 = st.columns(2)
     step_clicked = c1.button("Step ▶", disabled=not st.session_state.initialized, use_container_width=True)
-    auto_clicked = c2.button("Run Auto ⏩", disabled=not st.session_state.initialized, use_container_width=True)
+    auto_clicked = c2.button("Run Auto ⏩", disabled=not st.session_state.initialized, use_container_width=True,
+                             help=f"In-memory runs pause after about {RUN_BUDGET.run_seconds:g} s; the limit is checked between steps, so one very slow step can overrun it.\n"
+                                  f"Persisted runs go to a worker process that is stopped after {PERSISTED_RUN_SECONDS:g} s.")
 
     if st.session_state.initialized:
         tol_val = float(tol_input) if tol_input else 1e-4
@@ -297,22 +374,39 @@ with st.sidebar:
         
         if step_clicked:
             res = st.session_state.engine.step()
-            if "error_msg" in res:
-                st.session_state.runtime_error = get_friendly_error_message(res["error_msg"])
+            if isinstance(res["error"], str):
+                st.session_state.runtime_error = get_friendly_error_message(res["error"])
             else:
                 st.session_state.runtime_error = None
                 new_data.append(res)
 
         if auto_clicked:
-            with st.spinner(f"Crunching {max_iter_input} iterations..."):
-                results = st.session_state.engine.run_auto(tol_val, int(max_iter_input))
             st.session_state.runtime_error = None
+            with st.spinner(f"Crunching {max_iter_input} iterations..."):
+                try:
+                    if st.session_state.engine.store is not None:
+                        results = st.session_state.engine.run_in_worker(tol_val, int(max_iter_input), get_job_executor())
+                    else:
+                        results = st.session_state.engine.run_cached(tol_val, int(max_iter_input), get_run_cache())
+                except WorkersBusy:
+                    results = []
+                    st.session_state.runtime_error = "⏳ **Busy:** Other sessions are using every worker; try again in a moment."
+                except EvaluationTimeout:
+                    results = []
+                    st.session_state.runtime_error = f"⏱️ **Timeout:** The run was stopped after {PERSISTED_RUN_SECONDS:g} s and is back at its last checkpoint."
+                except RuntimeError as e:
+                    results = []
+                    st.session_state.runtime_error = get_friendly_error_message(e)
             for res in results:
-                if "error_msg" in res:
-                    st.session_state.runtime_error = get_friendly_error_message(res["error_msg"])
+                if isinstance(res["error"], str):
+                    st.session_state.runtime_error = get_friendly_error_message(res["error"])
                     break
                 new_data.append(res)
         
+        if (step_clicked or auto_clicked) and st.session_state.engine.store is not None:
+            # Persisted runs can be picked up again after a restart or session timeout.
+            save_checkpoint(st.session_state.engine.checkpoint(), st.session_state.engine.store.path + ".ckpt")
+
         if new_data:
             rows = []
             for r in new_data:
@@ -340,18 +434,22 @@ if st.session_state.initialized:
         curr_err = last["Error (%)"]
         curr_iter = int(last["Iteration"])
         
-        try: tol_val = float(tol_input)
-        except: tol_val = 1e-4
+        tol_val = parse_tolerance(tol_input)
         max_iter = int(max_iter_input)
 
         if curr_err < tol_val and curr_iter > 0:
-            st.markdown(f'<div class="success-box">✅ Solution Converged<br><span style="font-size:0.9rem; opacity:0.8">Target reached at x = {curr_x:.{decimals}f}</span></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="success-box">✅ Solution Converged<br><span style="font-size:0.9rem; opacity:0.8">Target reached at x = {st.session_state.engine.format_value(curr_x, decimals)}</span></div>', unsafe_allow_html=True)
+        elif st.session_state.engine.stop_reason == "budget" and auto_clicked:
+            budget_seconds = PERSISTED_RUN_SECONDS if st.session_state.engine.store is not None else RUN_BUDGET.run_seconds
+            st.warning(f"⏸️ Paused at iteration {curr_iter:,} after the {budget_seconds:g} s run budget. Click **Run Auto** to continue.")
+        elif st.session_state.engine.stop_reason == "precision" and auto_clicked:
+            st.warning(f"⚠️ Stopped at the {st.session_state.engine.backend.name} precision limit: the tolerance is finer than it can resolve.")
         elif curr_iter >= max_iter and auto_clicked: 
             st.warning(f"⚠️ Iterations ({curr_iter}) reached without convergence.")
 
         k1, k2, k3 = st.columns(3)
         k1.markdown(f'<div class="stat-box"><div class="stat-label">Iteration</div><div class="stat-value">#{curr_iter}</div></div>', unsafe_allow_html=True)
-        k2.markdown(f'<div class="stat-box"><div class="stat-label">Current X</div><div class="stat-value">{curr_x:.{decimals}f}</div></div>', unsafe_allow_html=True)
+        k2.markdown(f'<div class="stat-box"><div class="stat-label">Current X</div><div class="stat-value">{st.session_state.engine.format_value(curr_x, decimals)}</div></div>', unsafe_allow_html=True)
         
         if curr_iter == 0:
             err_display = "-" 
@@ -361,144 +459,6 @@ if st.session_state.initialized:
             err_style = "color: #EF553B;" if curr_err > tol_val else "color: #00CC96;"
 
         k3.markdown(f'<div class="stat-box"><div class="stat-label">Relative Error</div><div class="stat-value" style="{err_style}">{err_display}</div></div>', unsafe_allow_html=True)
-
-        tab_plot, tab_data = st.tabs(["🕸️ Interactive Plot", "📋 Data Table"])
-
-        with tab_plot:
-            plot_history = st.session_state.engine.history
-            
-            try: x_start = float(x0_input)
-            except: x_start = 0.0
-
-            try:
-                x_next_pred = st.session_state.engine.g_func(x_start)
-                if np.isnan(x_next_pred) or abs(x_next_pred) > 1e10: x_next_pred = x_start 
-            except: x_next_pred = x_start
-            
-            static_pts = [x_start, x_next_pred]
-            sp_min, sp_max = min(static_pts), max(static_pts)
-            sp_span = sp_max - sp_min
-            if sp_span == 0: sp_span = abs(sp_min) * 0.5 if sp_min != 0 else 2.0
-            sp_buff = sp_span * 0.5
-            static_range = [sp_min - sp_buff, sp_max + sp_buff]
-
-            smart_pts = []
-            if plot_history:
-                recent = plot_history[-20:] 
-                for p in recent: smart_pts.extend([p[0], p[1]])
-            else:
-                smart_pts = static_pts
-
-            smart_pts = [p for p in smart_pts if abs(p) < 1e10]  
-            if not smart_pts: smart_pts = [x_start]
-            
-            fp_min, fp_max = min(smart_pts), max(smart_pts)
-            fp_span = fp_max - fp_min
-            if fp_span == 0: fp_span = abs(fp_min)*0.4 if fp_min!=0 else 1.0
-            fp_buff = fp_span * 0.25
-            smart_range = [fp_min - fp_buff, fp_max + fp_buff]
-
-            if auto_focus:
-                final_x = smart_range
-                final_y = smart_range
-                ui_rev = f"step_{curr_iter}"
-            else:
-                final_x = static_range
-                final_y = static_range
-                ui_rev = "constant_view" 
-
-            bg_limit = max(abs(sp_max), abs(sp_min), sp_span) * 50
-            if bg_limit == 0: bg_limit = 100
-            x_bg = np.linspace(-bg_limit, bg_limit, 2000) 
-            y_bg = []
-            for v in x_bg:
-                try:
-                    r = st.session_state.engine.g_func(v)
-                    if np.isnan(r) or np.iscomplex(r): y_bg.append(None)
-                    else: y_bg.append(r)
-                except: y_bg.append(None)
-
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=[-bg_limit, bg_limit], y=[-bg_limit, bg_limit], mode='lines', name='y=x', 
-                                     line=dict(color='#7F8C8D', dash='dash', width=2), hoverinfo='skip'))
-            fig.add_trace(go.Scatter(x=x_bg, y=y_bg, mode='lines', name='g(x)', 
-                                     line=dict(color='#00B4D8', width=3)))
-
-            if show_cobweb and plot_history:
-                cx, cy = [], []
-                sx = plot_history[0][0]
-                cx.append(sx); cy.append(sx)
-                for px, nx in plot_history:
-                    cx.extend([px, px, nx, nx])
-                    cy.extend([px, nx, nx, nx])
-                fig.add_trace(go.Scatter(x=cx, y=cy, mode='lines+markers', name='Path', 
-                                         line=dict(color='#F59E0B', width=2), 
-                                         marker=dict(size=5, color='#F59E0B'))) 
-
-            fig.add_trace(go.Scatter(x=[curr_x], y=[curr_x], mode='markers', name='Current', 
-                                     marker=dict(size=14, color='#F72585', symbol='diamond', 
-                                                 line=dict(color='white', width=2))))
-
-            fig.update_layout(
-                height=500, 
-                dragmode='pan',
-                uirevision=ui_rev, 
-                paper_bgcolor='rgba(0,0,0,0)', 
-                plot_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(
-                    title="x", 
-                    range=final_x,
-                    zeroline=True, zerolinewidth=1.5, zerolinecolor='#9CA3AF',
-                    gridcolor='rgba(128, 128, 128, 0.1)',
-                    showgrid=True
-                ),
-                yaxis=dict(
-                    title="g(x)", 
-                    range=final_y,
-                    zeroline=True, zerolinewidth=1.5, zerolinecolor='#9CA3AF',
-                    gridcolor='rgba(128, 128, 128, 0.1)',
-                    showgrid=True
-                ),
-                margin=dict(l=20, r=20, t=30, b=20), 
-                legend=dict(
-                    x=0.01, y=0.99,
-                    xanchor="left", yanchor="top",
-                    bgcolor="rgba(128, 128, 128, 0.2)",
-                    bordercolor="rgba(128, 128, 128, 0.3)",
-                    borderwidth=1
-                )
-            )
-            st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': True, 'displayModeBar': True})
-
-        with tab_data:
-            st.info(
-                """
-                ℹ️ **Note on Precision:** Calculations are performed using full floating-point precision (15+ digits). 
-                The values below are **rounded** for readability.
-                """
-            )
-
-            fmt_dict = {
-                "Previous X": f"{{:.{decimals}f}}",
-                "Current X": f"{{:.{decimals}f}}",
-                "Error (%)": f"{{:.{decimals}f}}" 
-            }
-            
-            def highlight_success(row):
-                try:
-                    e = float(row['Error (%)'])
-                    i = int(row['Iteration'])
-                    if e < tol_val and i > 0:
-                        return ['background-color: rgba(52, 211, 153, 0.25)'] * len(row)
-                except: pass
-                return [''] * len(row)
-
-            styled_df = st.session_state.history_df.style\
-                .apply(highlight_success, axis=1)\
-                .format(fmt_dict)
-            
-            st.dataframe(styled_df, use_container_width=True, hide_index=True)
-
 else:
     st.markdown("### 👋 Welcome! Ready to converge?")
     st.markdown("Use the sidebar 👈 to configure your function, then click **Initialize**.")
@@ -509,4 +469,305 @@ else:
     with w2:
         st.markdown('<div class="landing-card"><span class="landing-icon">🔬</span><div class="landing-title">Analyze</div><div class="landing-text">Track relative error and convergence speed with precision.</div></div>', unsafe_allow_html=True)
     with w3:
-        st.markdown('<div class="landing-card"><span class="landing-icon">🧪</span><div class="landing-title">Experiment</div><div class="landing-text">Test functions, initial guesses, and tolerances in a safe sandbox.</div></div>', unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown('<div class="landing-card"><span class="landing-icon">🧪</span><div class="landing-title">Experiment</div><div class="landing-text">Test functions, initial guesses, and tolerances in a safe sandbox.</div></div>', unsafe_allow_html=True)
+
+# The Basin Map and Systems tabs have their own inputs, so they work without a scalar run.
+tab_plot, tab_data, tab_basin, tab_system = st.tabs(["🕸️ Interactive Plot", "📋 Data Table", "🗺️ Basin Map", "🧮 Systems"])
+
+with tab_plot:
+    if not st.session_state.initialized:
+        st.info("Initialize a function in the sidebar to draw its cobweb plot.")
+    elif len(st.session_state.history_df) > 0:
+        # A box selection on the chart is the viewport request: the curve is
+        # re-sampled for just that range at the resolution it needs.
+        if auto_focus and (step_clicked or auto_clicked):
+            st.session_state.view_range = None
+        plot_event = st.session_state.get("cobweb_plot")
+        boxes = plot_event.selection.get("box", []) if plot_event else []
+        if boxes:
+            box = boxes[-1]
+            view = (min(box["x"]), max(box["x"]), min(box["y"]), max(box["y"]))
+            if view != st.session_state.last_box and view[1] > view[0] and view[3] > view[2]:
+                st.session_state.view_range = view
+                st.session_state.last_box = view
+
+        v1, v2 = st.columns([4, 1])
+        v1.caption("Pan and scroll to explore; box-select (toolbar) to zoom in with a freshly sampled curve.")
+        if v2.button("Reset View", use_container_width=True, disabled=st.session_state.view_range is None):
+            st.session_state.view_range = None
+
+        # Cobweb vertices: (x_n, g(x_n)) then (g(x_n), g(x_n)), starting on the diagonal.
+        plot_history = [(float(a), float(b)) for a, b in st.session_state.engine.history]
+        if plot_history:
+            plot_history[0] = (plot_history[0][0], plot_history[0][0])
+        
+        try: x_start = float(x0_input)
+        except: x_start = 0.0
+
+        try:
+            x_next_pred = float(st.session_state.engine.g_func(x_start))
+            if np.isnan(x_next_pred) or abs(x_next_pred) > 1e10: x_next_pred = x_start 
+        except: x_next_pred = x_start
+        
+        static_pts = [x_start, x_next_pred]
+        sp_min, sp_max = min(static_pts), max(static_pts)
+        sp_span = sp_max - sp_min
+        if sp_span == 0: sp_span = abs(sp_min) * 0.5 if sp_min != 0 else 2.0
+        sp_buff = sp_span * 0.5
+        static_range = [sp_min - sp_buff, sp_max + sp_buff]
+
+        smart_pts = []
+        if plot_history:
+            recent = plot_history[-40:] 
+            for p in recent: smart_pts.extend([p[0], p[1]])
+        else:
+            smart_pts = static_pts
+
+        smart_pts = [p for p in smart_pts if abs(p) < 1e10]  
+        if not smart_pts: smart_pts = [x_start]
+        
+        fp_min, fp_max = min(smart_pts), max(smart_pts)
+        fp_span = fp_max - fp_min
+        if fp_span == 0: fp_span = abs(fp_min)*0.4 if fp_min!=0 else 1.0
+        fp_buff = fp_span * 0.25
+        smart_range = [fp_min - fp_buff, fp_max + fp_buff]
+
+        if auto_focus:
+            final_x = smart_range
+            final_y = smart_range
+            ui_rev = f"step_{curr_iter}"
+        else:
+            final_x = static_range
+            final_y = static_range
+            ui_rev = "constant_view" 
+
+        if st.session_state.view_range:
+            final_x = list(st.session_state.view_range[:2])
+            final_y = list(st.session_state.view_range[2:])
+            ui_rev = f"view_{st.session_state.view_range}"
+
+        bg_limit = max(abs(sp_max), abs(sp_min), sp_span) * 50
+        if bg_limit == 0: bg_limit = 100
+        # One sampler (and tile cache) per expression and parameter values.
+        samplers = st.session_state.setdefault("samplers", {})
+        curve_key = compile_expression(st.session_state.engine.g_str, params=st.session_state.engine.params).key()
+        sampler = samplers.get(curve_key)
+        if sampler is None:
+            if len(samplers) >= 16: samplers.pop(next(iter(samplers)))
+            sampler = samplers[curve_key] = CurveSampler(st.session_state.engine.g_str, params=st.session_state.engine.params)
+        view_span = final_x[1] - final_x[0]
+        x_bg, y_bg = sampler.sample_view(final_x[0], final_x[1],
+                                         final_x[0] - PAN_MARGIN * view_span, final_x[1] + PAN_MARGIN * view_span)
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=[-bg_limit, bg_limit], y=[-bg_limit, bg_limit], mode='lines', name='y=x', 
+                                 line=dict(color='#7F8C8D', dash='dash', width=2), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=x_bg, y=y_bg, mode='lines', name='g(x)', 
+                                 line=dict(color='#00B4D8', width=3)))
+
+        if show_cobweb and len(plot_history) > 1:
+            cx, cy = zip(*plot_history)
+            fig.add_trace(go.Scatter(x=cx, y=cy, mode='lines+markers', name='Path', 
+                                     line=dict(color='#F59E0B', width=2), 
+                                     marker=dict(size=5, color='#F59E0B'))) 
+
+        if show_fixed:
+            # The view gets its own scan, so close fixed points stay apart when zoomed in;
+            # the wide scan adds those off screen.
+            fp_params = tuple(sorted(st.session_state.engine.params.items()))
+            try:
+                fixed_points = find_fixed_points(st.session_state.engine.g_str, float(final_x[0]), float(final_x[1]), params=fp_params)
+                fixed_points += tuple(p for p in find_fixed_points(st.session_state.engine.g_str, -float(bg_limit), float(bg_limit), params=fp_params)
+                                      if not final_x[0] <= p["x"] <= final_x[1])
+            except Exception: fixed_points = ()
+            for kind, color, symbol in FIXED_POINT_STYLES:
+                pts = [p["x"] for p in fixed_points if p["kind"] == kind]
+                if pts:
+                    fig.add_trace(go.Scatter(x=pts, y=pts, mode='markers', name=kind.capitalize(),
+                                             marker=dict(size=11, color=color, symbol=symbol, line=dict(color='white', width=1)),
+                                             hovertemplate="x* = %{x}<extra>" + kind + "</extra>"))
+
+        fig.add_trace(go.Scatter(x=[float(curr_x)], y=[float(curr_x)], mode='markers', name='Current', 
+                                 marker=dict(size=14, color='#F72585', symbol='diamond', 
+                                             line=dict(color='white', width=2))))
+
+        fig.update_layout(
+            height=500, 
+            dragmode='pan',
+            uirevision=ui_rev, 
+            paper_bgcolor='rgba(0,0,0,0)', 
+            plot_bgcolor='rgba(0,0,0,0)',
+            xaxis=dict(
+                title="x", 
+                range=final_x,
+                zeroline=True, zerolinewidth=1.5, zerolinecolor='#9CA3AF',
+                gridcolor='rgba(128, 128, 128, 0.1)',
+                showgrid=True
+            ),
+            yaxis=dict(
+                title="g(x)", 
+                range=final_y,
+                zeroline=True, zerolinewidth=1.5, zerolinecolor='#9CA3AF',
+                gridcolor='rgba(128, 128, 128, 0.1)',
+                showgrid=True
+            ),
+            margin=dict(l=20, r=20, t=30, b=20), 
+            legend=dict(
+                x=0.01, y=0.99,
+                xanchor="left", yanchor="top",
+                bgcolor="rgba(128, 128, 128, 0.2)",
+                bordercolor="rgba(128, 128, 128, 0.3)",
+                borderwidth=1
+            )
+        )
+        st.plotly_chart(fig, use_container_width=True, config={'scrollZoom': True, 'displayModeBar': True},
+                        key="cobweb_plot", on_select="rerun", selection_mode="box")
+
+with tab_data:
+    if not st.session_state.initialized:
+        st.info("Initialize a function in the sidebar to see its iteration history.")
+    elif len(st.session_state.history_df) > 0:
+        st.info(
+            f"""
+            ℹ️ **Note on Precision:** Calculations are performed at the selected backend's full precision ({st.session_state.engine.backend.digits}+ digits). 
+            The values below are **rounded** for readability.
+            """
+        )
+
+        fmt_value = lambda v: st.session_state.engine.format_value(v, decimals)
+        fmt_dict = {
+            "Previous X": fmt_value,
+            "Current X": fmt_value,
+            "Error (%)": f"{{:.{decimals}f}}" 
+        }
+
+        table_df = st.session_state.history_df
+        saved_runs = sorted(glob.glob(os.path.join(RUNS_DIR, "*.fpi")), reverse=True)
+        run_store = st.session_state.engine.store
+        if saved_runs:
+            current = "Current run" if run_store is not None else "Current run (in memory)"
+            source = st.selectbox("Source:", [current] + saved_runs)
+            if source != current:
+                run_store = open_saved_run(source)
+            else:
+                open_saved_run(None)
+        if run_store is not None:
+            # Only the visible page is read from the mapped file.
+            total_rows = len(run_store)
+            start_row = st.number_input(f"First row (of {total_rows:,}):", min_value=0,
+                                        max_value=max(total_rows - 1, 0), value=max(total_rows - STORE_PAGE_ROWS, 0),
+                                        step=STORE_PAGE_ROWS)
+            table_df = pd.DataFrame(run_store.window(start_row, start_row + STORE_PAGE_ROWS))\
+                .rename(columns={"step": "Iteration", "x_in": "Previous X", "x_out": "Current X", "error": "Error (%)"})
+
+        styled_df = table_df.style\
+            .apply(highlight_converged, axis=None, tol=tol_val)\
+            .format(fmt_dict)
+        
+        st.dataframe(styled_df, use_container_width=True, hide_index=True)
+
+        # Exports stream the full history from the engine's arrays, not the styled table.
+        e1, e2, e3 = st.columns([1, 1, 2])
+        export_fmt = e1.selectbox("Export format:", FORMATS, label_visibility="collapsed")
+        if e2.button("Prepare Export", use_container_width=True):
+            export_records = run_store if run_store is not None else st.session_state.engine.records
+            try:
+                st.session_state.export_file = (f"history.{export_fmt}", export_bytes(export_records.window(), export_fmt, tol_val))
+            except ImportError as e:
+                st.error(f"⚠️ **Export Error:** {e}")
+        if st.session_state.get("export_file"):
+            name, data = st.session_state.export_file
+            e3.download_button(f"⬇️ Download {name}", data=data, file_name=name, use_container_width=True)
+
+with tab_basin:
+    st.caption("Long-term behaviour of $x_{n+1} = g(x_n; a)$ for every $x_0$ and parameter value on a grid.")
+    b1, b2 = st.columns(2)
+    basin_func = b1.text_input("g(x; a):", value="a*cos(x)")
+    param_name = b2.text_input("Parameter name:", value="a")
+    b3, b4, b5, b6 = st.columns(4)
+    x0_lo = b3.number_input("x₀ from:", value=-5.0)
+    x0_hi = b4.number_input("x₀ to:", value=5.0)
+    p_lo = b5.number_input("Parameter from:", value=0.1)
+    p_hi = b6.number_input("Parameter to:", value=3.0)
+    b7, b8, b9, b10 = st.columns(4)
+    resolution = b7.select_slider("Resolution:", options=[100, 200, 500, 1000, 2000], value=200)
+    basin_iter = b8.number_input("Max Iterations (map):", value=200, min_value=10, max_value=5000, step=50)
+    basin_tol = parse_tolerance(b9.text_input("Tolerance (map):", value="0.0001"))
+    basin_field = b10.selectbox("Show:", ["fixed_point", "iterations", "period"],
+                               format_func=lambda f: {"fixed_point": "Converged x*", "iterations": "Iterations", "period": "Period (-1 = diverged, 0 = unresolved)"}[f])
+
+    if st.button("Generate Map", type="primary"):
+        try:
+            with st.spinner(f"Iterating {resolution * resolution:,} starting points..."):
+                job = functools.partial(basin_map, process_math_input(basin_func), (x0_lo, x0_hi), resolution,
+                                        (p_lo, p_hi), resolution, param_name=param_name.strip() or "a",
+                                        max_iter=int(basin_iter), tol=basin_tol / 100,
+                                        bound=parse_parameters(params_input))
+                st.session_state.basin_result = get_job_executor().run(job, timeout=BASIN_TIMEOUT,
+                                                                       queue_timeout=QUEUE_SECONDS)
+        except WorkersBusy:
+            st.warning("⏳ **Busy:** Other sessions are using every worker; try again in a moment.")
+        except EvaluationTimeout:
+            st.error(f"⏱️ **Timeout:** The map took longer than {BASIN_TIMEOUT:g} s; lower the resolution or iterations.")
+        except Exception as e:
+            st.error(get_friendly_error_message(e))
+
+    basin = st.session_state.get("basin_result")
+    if basin is not None:
+        heat = go.Figure(go.Heatmap(z=basin[basin_field], x=basin["x0"], y=basin["param"],
+                                    colorscale="Viridis", colorbar=dict(title=basin_field)))
+        heat.update_layout(height=500, xaxis_title="x₀", yaxis_title=param_name,
+                           paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                           margin=dict(l=20, r=20, t=30, b=20))
+        st.plotly_chart(heat, use_container_width=True)
+
+with tab_system:
+    st.caption("Fixed-point iteration for systems $\\mathbf{x} = G(\\mathbf{x})$: one equation per line, in variables x, y, z, w (x1 … xn beyond four).")
+    s1, s2 = st.columns([2, 1])
+    system_raw = s1.text_area("G(x):", value="cos(y)/2\nsin(x)/3 + 0.1", height=120)
+    system_x0 = s2.text_input("Initial vector:", value="0.5, 0.5")
+    anderson = s2.slider("Anderson depth:", 0, 10, 0, help="0: plain iteration. m > 0 mixes the last m steps, which often rescues slow or divergent iterations.")
+    system_iter = s2.number_input("Max Iterations (system):", value=500, min_value=1, max_value=100000, step=50)
+    system_tol = parse_tolerance(s2.text_input("Tolerance (system):", value="0.0001"))
+
+    if st.button("Solve System", type="primary"):
+        lines = [process_math_input(line) for line in system_raw.splitlines() if line.strip()]
+        system_engine = SystemEngine()
+        system_engine.budget = RUN_BUDGET
+        success, eng_msg = system_engine.initialize(lines, system_x0, params=params_input, anderson=anderson)
+        if success:
+            with np.errstate(all='ignore'):
+                start_rate = system_engine.spectral_radius()
+            results = system_engine.run_auto(system_tol, int(system_iter), keep_results=False)
+            if system_engine.stop_reason == "error":
+                st.error(get_friendly_error_message(results[-1]["error"]))
+            st.session_state.system_result = (system_engine, start_rate, system_tol)
+        else:
+            st.error(get_friendly_error_message(eng_msg))
+
+    if st.session_state.get("system_result"):
+        system_engine, start_rate, system_tol = st.session_state.system_result
+        with np.errstate(all='ignore'):
+            end_rate = system_engine.spectral_radius()
+        names = list(system_engine.system.variables)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Iterations", f"{system_engine.step_count:,}", system_engine.stop_reason)
+        m2.metric("ρ(J) at x₀", f"{start_rate:.4g}", "converges" if start_rate < 1 else "may diverge", delta_color="off")
+        m3.metric("ρ(J) at solution", f"{end_rate:.4g}")
+        st.code(", ".join(f"{n} = {np.format_float_positional(v, precision=decimals, unique=False)}" for n, v in zip(names, system_engine.previous_x)))
+
+        errors = system_engine.error_history[1:]
+        if len(errors):
+            err_fig = go.Figure(go.Scatter(x=np.arange(1, len(errors) + 1), y=errors, mode='lines+markers',
+                                           line=dict(color='#F59E0B')))
+            err_fig.update_layout(height=300, xaxis_title="Iteration", yaxis_title="Error (%)", yaxis_type="log",
+                                  paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                                  margin=dict(l=20, r=20, t=30, b=20))
+            st.plotly_chart(err_fig, use_container_width=True)
+
+        tail = slice(max(system_engine.rows - STORE_PAGE_ROWS, 0), None)
+        system_df = pd.DataFrame(system_engine.trajectory[tail].astype(float), columns=names)
+        system_df.insert(0, "Iteration", np.arange(system_engine.rows)[tail])
+        system_df["Error (%)"] = system_engine.error_history[tail]
+        st.dataframe(system_df.style.apply(highlight_converged, axis=None, tol=system_tol).format(precision=decimals),
+                     use_container_width=True, hide_index=True)
@@ -1,2 +1,4 @@
 from .core import IterationEngine
+from .rootfinding import RootEngine
+from .fixedpoints import find_fixed_points
 from .ui import ConvergenceApp
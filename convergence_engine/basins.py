@@ -0,0 +1,122 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .core import compile_expression
+
+CHUNK_SIZE = 1 << 18
+MAX_PERIOD = 8
+DIVERGED = -1
+UNRESOLVED = 0
+
+
+def iterate_chunk(g_expression, x0, params, param_name="a", max_iter=200, tol=1e-10, max_period=MAX_PERIOD, bound=None):
+    """
+    Iterates every (x0, param) pair of a chunk at once.
+
+    Points are dropped from the working set as soon as they converge or
+    diverge, so each step only costs as much as what is still moving.
+    Points still moving after max_iter are checked for cycles up to max_period.
+    bound fixes any other parameters of g.
+    Returns (fixed_point, iterations, period) arrays; period is 1 for a fixed
+    point, p for a p-cycle, DIVERGED or UNRESOLVED otherwise.
+    """
+    g_func = compile_expression(g_expression, params=bound)
+    g = lambda x, p: g_func(x, **{param_name: p})
+    x0 = np.asarray(x0, dtype=float)
+    params = np.broadcast_to(np.asarray(params, dtype=float), x0.shape)
+    n = x0.size
+
+    fixed_point = np.full(n, np.nan)
+    iterations = np.full(n, max_iter, dtype=np.int32)
+    period = np.full(n, UNRESOLVED, dtype=np.int8)
+
+    idx = np.arange(n)
+    x, p = x0.copy(), params.copy()
+    with np.errstate(all='ignore'):
+        for step in range(1, max_iter + 1):
+            if idx.size == 0:
+                break
+            x_next = np.broadcast_to(np.asarray(g(x, p), dtype=float), x.shape)
+            diverged = ~np.isfinite(x_next) | (np.abs(x_next) > 1e100)
+            converged = ~diverged & (np.abs(x_next - x) <= tol * (1 + np.abs(x_next)))
+            done = diverged | converged
+
+            if done.any():
+                hit = idx[converged]
+                fixed_point[hit] = x_next[converged]
+                period[hit] = 1
+                iterations[hit] = step
+                lost = idx[diverged]
+                period[lost] = DIVERGED
+                iterations[lost] = step
+                keep = ~done
+                idx, x, p = idx[keep], x_next[keep], p[keep]
+            else:
+                x = x_next
+
+        if idx.size:
+            orbit = [x]
+            for _ in range(max_period):
+                orbit.append(np.asarray(g(orbit[-1], p), dtype=float))
+            orbit = np.array(orbit)
+            found = np.zeros(idx.size, dtype=bool)
+            for q in range(2, max_period + 1):
+                match = ~found & (np.abs(orbit[q] - orbit[0]) <= tol * 1e3 * (1 + np.abs(orbit[0])))
+                period[idx[match]] = q
+                found |= match
+    return fixed_point, iterations, period
+
+
+def _run_chunk(args):
+    return iterate_chunk(*args)
+
+
+def basin_map(g_expression, x_range, x_points, param_range=None, param_points=1, param_name="a",
+              max_iter=200, tol=1e-10, max_period=MAX_PERIOD, chunk_size=CHUNK_SIZE, workers=None, bound=None):
+    """
+    Long-term behaviour of x_{n+1} = g(x_n; param) over an (x0, param) grid.
+
+    The grid is flattened and processed in chunks of chunk_size points so
+    memory stays bounded; with workers > 1 the chunks go to a process pool.
+    Returns a dict of 1-D axes "x0" and "param" plus (param_points, x_points)
+    rasters "fixed_point", "iterations" and "period", ready for a heatmap.
+    """
+    xs = np.linspace(x_range[0], x_range[1], int(x_points))
+    if param_range is None:
+        ps = np.zeros(1)
+    else:
+        ps = np.linspace(param_range[0], param_range[1], int(param_points))
+
+    total = xs.size * ps.size
+    jobs = []
+    for start in range(0, total, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, total))
+        jobs.append((g_expression, xs[flat % xs.size], ps[flat // xs.size], param_name, max_iter, tol, max_period, bound))
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    else:
+        parts = [_run_chunk(job) for job in jobs]
+
+    shape = (ps.size, xs.size)
+    return {
+        "x0": xs,
+        "param": ps,
+        "fixed_point": np.concatenate([part[0] for part in parts]).reshape(shape),
+        "iterations": np.concatenate([part[1] for part in parts]).reshape(shape),
+        "period": np.concatenate([part[2] for part in parts]).reshape(shape),
+    }
+
+
+def parameter_sweep(g_expression, x0, param_name, values, max_iter=200, tol=1e-10, bound=None):
+    """
+    Runs x_{n+1} = g(x_n; param) from the same x0 for every value in one
+    vectorized pass, instead of re-initializing an engine per value.
+    Returns a dict like basin_map's rasters, but 1-D over `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    fixed_point, iterations, period = iterate_chunk(g_expression, np.full(values.shape, float(x0)), values,
+                                                    param_name, max_iter, tol, bound=bound)
+    return {"param": values, "fixed_point": fixed_point, "iterations": iterations, "period": period}
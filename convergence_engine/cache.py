@@ -0,0 +1,136 @@
+import ast
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .store import STEP_DTYPE
+
+MAX_ENTRIES = 64
+# Records kept in memory, over all entries; a single run above MAX_RUN_BYTES
+# (250k steps) is not cached at all.
+MAX_BYTES = 64 << 20
+MAX_RUN_BYTES = 8 << 20
+
+
+def normalize_expression(expression):
+    """
+    Canonical form of an expression, so 'cos(x)+1' and 'cos( x ) + (1)' share
+    cache entries.
+    """
+    return ast.dump(ast.parse(expression.strip(), mode="eval"))
+
+
+def run_key(expression, x0, tolerance, params=None, precision="float64", digits=None):
+    """
+    Content address of a run. max_iter is deliberately not part of it: a
+    cached run is truncated or resumed to match the requested max_iter.
+    """
+    payload = json.dumps({
+        "expression": normalize_expression(expression),
+        "x0": str(x0).strip(),
+        "tolerance": repr(float(tolerance)),
+        "params": sorted((k, str(v)) for k, v in (params or {}).items()),
+        "precision": precision,
+        "digits": digits if precision in ("mpmath", "adaptive") else None,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RunCache:
+    """
+    Content-addressed store of finished runs: an LRU dict in memory, plus an
+    optional directory of .npz files that survives restarts and can be
+    shared between processes.
+
+    An entry holds the STEP_DTYPE records of the run and its final state
+    (last iterate as text, step count, stop reason, backend), which is
+    enough to hand a repeated run back immediately or to resume it. The
+    memory held is bounded by both max_entries and max_bytes.
+    """
+    def __init__(self, directory=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, max_run_bytes=MAX_RUN_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_run_bytes = max_run_bytes
+        self.bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        """
+        Returns (records, state) or None. records is a private copy.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None and self.directory and os.path.exists(self._path(key)):
+            with np.load(self._path(key), allow_pickle=False) as data:
+                entry = (data["records"].astype(STEP_DTYPE), json.loads(str(data["state"])))
+            self._remember(key, entry)
+        if entry is None:
+            return None
+        return entry[0].copy(), dict(entry[1])
+
+    def put(self, key, records, state):
+        """
+        Caches a run; runs over max_run_bytes of records are skipped.
+        """
+        if len(records) * STEP_DTYPE.itemsize > self.max_run_bytes:
+            return
+        entry = (np.array(records, dtype=STEP_DTYPE), dict(state))
+        self._remember(key, entry)
+        if self.directory:
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, records=entry[0], state=np.array(json.dumps(entry[1])))
+            os.replace(tmp, self._path(key))
+
+    def _remember(self, key, entry):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[0].nbytes
+            self.entries[key] = entry
+            self.bytes += entry[0].nbytes
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (records, _) = self.entries.popitem(last=False)
+                self.bytes -= records.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+
+def resolve(records, state, max_iter):
+    """
+    Fits a cached run to the requested max_iter. Returns (records, state,
+    complete): complete is False when the cached run stopped at a smaller
+    max_iter and should be resumed from its last iterate. Returns None when
+    the entry can't serve the request (cutting a run short needs the
+    iterate at the cut, which is only exact in float64).
+    """
+    steps = int(state["steps"])
+    if max_iter < steps:
+        if state.get("backend") != "float64":
+            return None
+        # The run didn't stop before `steps`, so its first max_iter steps are
+        # exactly what a shorter run would produce. The iterate after them
+        # is the x_out of the last kept row.
+        cut = records[:max_iter + 1]
+        state = dict(state, steps=max_iter, stop_reason="max_iter", x=float(cut["x_out"][-1]).hex(),
+                     error=float(cut["error"][-1]) if max_iter else None)
+        return cut, state, True
+    if state["stop_reason"] == "max_iter" and max_iter > steps:
+        return records, state, False
+    return records, state, True
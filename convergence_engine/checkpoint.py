@@ -0,0 +1,39 @@
+import hashlib
+import json
+import os
+
+from .cache import normalize_expression
+
+VERSION = 1
+
+
+def expression_id(expression, params=None):
+    """
+    Short identity of a compiled expression and its bound parameters, so a
+    checkpoint is never resumed against a different g(x).
+    """
+    payload = json.dumps([normalize_expression(expression), sorted((k, str(v)) for k, v in (params or {}).items())])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def save_checkpoint(checkpoint, path):
+    """
+    Writes a checkpoint dict as JSON. The file is replaced atomically, so a
+    crash mid-write leaves the previous checkpoint intact.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_checkpoint(path):
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {checkpoint.get('version')}")
+    return checkpoint
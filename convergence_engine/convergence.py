@@ -0,0 +1,34 @@
+import numpy as np
+
+# Steps where both iterates are this close to zero count as converged (error 0).
+ZERO_ATOL = 1e-15
+
+
+def step_error(x_in, x_out):
+    """
+    Relative error (%) |x_out - x_in| / |x_out| * 100 of one step, for the
+    engines' stepping loops; works on any backend's numbers. A step landing
+    exactly on 0 from elsewhere is 100%; a step with both iterates within
+    ZERO_ATOL of 0 is 0%. The stored error column comes from here, so the
+    table and exports never recompute it.
+    """
+    if abs(x_out) < ZERO_ATOL and abs(x_in) < ZERO_ATOL:
+        return 0.0
+    if x_out == 0:
+        return 100.0
+    return float(abs((x_out - x_in) / x_out) * 100)
+
+
+def converged_mask(error, step, tolerance):
+    """
+    True for every step (past the start) whose error is below tolerance.
+    """
+    return (np.asarray(error, dtype=float) < tolerance) & (np.asarray(step) > 0)
+
+
+def row_styles(error, step, tolerance, style):
+    """
+    One CSS string per row: `style` on converged rows, '' elsewhere, for a
+    whole table in one pass.
+    """
+    return np.where(converged_mask(error, step, tolerance), style, "")
@@ -1,6 +1,139 @@
 
+import ast
+import time
+
 import numpy as np
 
+from .precision import MPBackend, digits_for_tolerance, get_backend, DEFAULT_DIGITS
+from .store import RunStore, StepLog
+from .cache import resolve, run_key
+from .checkpoint import VERSION, expression_id
+from .convergence import step_error
+from .sandbox import validate_expression
+from . import export
+
+# In-memory plot history kept (in points) while a RunStore holds the full run.
+HISTORY_LIMIT = 1000
+# Iterates beyond this magnitude end a run as divergent.
+OVERFLOW_LIMIT = 1e100
+
+class CompiledExpression:
+    """
+    An expression g(x; a, b, ...) compiled once. Named parameters are bound
+    with bind() or passed per call, as scalars or NumPy arrays, so a sweep
+    over a parameter is one broadcast evaluation.
+    """
+    def __init__(self, expression, backend=None, params=None):
+        self.source = expression
+        self.backend = backend or get_backend()
+        self.operations = validate_expression(expression)
+        self.code = compile(expression, "<string>", "eval")
+        self.context = self.backend.namespace()
+        self.globals = {**self.context, "__builtins__": {}}
+        self.params = {}
+        if params:
+            self.params = {k: self._convert(v) for k, v in params.items()}
+
+    @property
+    def free_names(self):
+        """
+        Names the expression uses that are neither x nor in the namespace:
+        the parameters it needs bound.
+        """
+        names = {node.id for node in ast.walk(ast.parse(self.source, mode="eval")) if isinstance(node, ast.Name)}
+        return sorted(n for n in names if n != 'x' and n not in self.context)
+
+    def _convert(self, value):
+        if isinstance(value, np.ndarray):
+            return value
+        return self.backend.convert(value)
+
+    def bind(self, **params):
+        """
+        Same compiled code with (more) parameters fixed.
+        """
+        bound = CompiledExpression.__new__(CompiledExpression)
+        bound.__dict__.update(self.__dict__)
+        bound.params = {**self.params, **{k: self._convert(v) for k, v in params.items()}}
+        return bound
+
+    def key(self):
+        """
+        Hashable identity of expression plus scalar parameter values, for caches.
+        """
+        return (self.source, tuple(sorted((k, str(v)) for k, v in self.params.items())))
+
+    def __call__(self, x, **params):
+        return eval(self.code, self.globals, {**self.params, **params, 'x': x})
+
+
+def compile_expression(expression, backend=None, params=None):
+    """
+    Turns an expression in x into a callable evaluated in the backend's namespace.
+    """
+    return CompiledExpression(expression, backend, params)
+
+
+def parse_parameters(text):
+    """
+    Parses "a=2, b=0.5" into {"a": "2", "b": "0.5"}. Values are kept as text
+    so each backend can read them at its own precision.
+    """
+    params = {}
+    for part in (text or "").replace(";", ",").split(","):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        name, value = name.strip(), value.strip()
+        if not sep or not name.isidentifier() or name == 'x':
+            raise ValueError(f"Invalid parameter '{part.strip()}': use name=value, e.g. a=2.")
+        float(value)
+        params[name] = value
+    return params
+
+def run_loop(engine, max_iter, operations, check, keep_results=True):
+    """
+    The Run Auto loop shared by IterationEngine and systems.SystemEngine.
+    Calls engine.step() until engine.step_count reaches max_iter, a step
+    fails ('error'), engine.budget is used up ('budget', counting
+    operations per step) or check(step_data) returns a stop reason. Sets
+    engine.stop_reason and returns the step data; with keep_results=False
+    only the last step.
+    """
+    results = []
+    engine.stop_reason = "max_iter"
+    budget = engine.budget
+    started = last = time.perf_counter()
+    steps = 0
+
+    while engine.step_count < max_iter:
+        if budget is not None:
+            now = time.perf_counter()
+            if budget.exceeded(started, last, now, steps * operations):
+                engine.stop_reason = "budget"
+                break
+            last = now
+            steps += 1
+
+        step_data = engine.step()
+        if not step_data or "error" in step_data and isinstance(step_data["error"], str):
+            results.append(step_data)
+            engine.stop_reason = "error"
+            break
+
+        if keep_results:
+            results.append(step_data)
+        else:
+            results[:] = [step_data]
+
+        reason = check(step_data)
+        if reason is not None:
+            engine.stop_reason = reason
+            break
+
+    return results
+
+
 class IterationEngine:
     """
     Handles the mathematical logic and state of the Fixed Point Iteration.
@@ -12,29 +145,117 @@ class IterationEngine:
         self.history = [] 
         self.step_count = 0
         self.error = None
+        self.precision = "float64"
+        self.digits = DEFAULT_DIGITS
+        self.backend = get_backend()
+        self.stop_reason = None
+        self.params = {}
+        self.store = None
+        self.log = StepLog()
+        # A sandbox.Budget bounding evaluation and run time; None is unbounded.
+        self.budget = None
 
-    def initialize(self, g_expression, x0):
+    def initialize(self, g_expression, x0, precision="float64", digits=DEFAULT_DIGITS, params=None):
         """
         Parses the function and sets initial state.
+        precision is one of precision.BACKENDS; digits applies to 'mpmath'
+        and caps how far 'adaptive' may refine. params binds named
+        parameters of g, e.g. {"a": 2} for a*cos(x).
         """
         try:
-            context = {k: v for k, v in np.__dict__.items() if callable(v) or isinstance(v, (int, float, np.number))}
-            context['np'] = np
-            context['x'] = 0 # Test variable
-            
+            self.params = dict(params or {})
+            self.precision = precision
+            self.digits = int(digits)
+            self.backend = get_backend(precision, self.digits)
             self.g_str = g_expression
-            self.g_func = lambda x: eval(g_expression, {"__builtins__": {}}, {**context, 'x': x})
-            
-            self.g_func(float(x0))
+            self.x0 = str(x0)
+            self.g_func = self._compile(g_expression)
+            missing = [n for n in self.g_func.free_names if n not in self.params]
+            if missing:
+                raise NameError(f"name '{missing[0]}' is not defined (bind it as a parameter)")
+
+            x_start = self.backend.convert(x0)
+            started = time.perf_counter()
+            self._evaluate(x_start)
+            if self.budget is not None and time.perf_counter() - started > self.budget.eval_seconds:
+                raise TimeoutError(f"one evaluation takes over {self.budget.eval_seconds:g} s")
             
-            self.previous_x = float(x0)
+            self.previous_x = x_start
             self.history = [(self.previous_x, 0)] # Start at (x0, 0)
+            self.log = StepLog()
+            self.log.append(0, x_start, x_start, 0.0)
             self.step_count = 0
             self.error = None
+            self.stop_reason = None
             return True, "Initialization Successful."
         except Exception as e:
             return False, f"Error parsing function: {e}"
 
+    def _compile(self, g_expression):
+        return compile_expression(g_expression, self.backend, self.params)
+
+    def _evaluate(self, x):
+        """
+        g(x) for step() and initialize(), held to the run's rules: iterates
+        beyond OVERFLOW_LIMIT (divergence) or off the reals raise. A step
+        whose evaluation raises is reported and not recorded.
+        """
+        if abs(x) > OVERFLOW_LIMIT:
+            raise OverflowError("Overflow: values are too large (divergence).")
+        try:
+            with np.errstate(all='ignore'):
+                x_out = self.g_func(x)
+        except OverflowError:
+            raise OverflowError("Overflow: calculation exceeded limits.")
+        if abs(x_out) > OVERFLOW_LIMIT:
+            raise OverflowError("Overflow: result exploded to infinity.")
+        if not self.backend.is_real(x_out):
+            raise ValueError("Domain error: result is not a real number.")
+        return x_out
+
+    def _accept(self, tolerance):
+        """
+        Whether a run whose step error fell below tolerance has converged;
+        run_auto otherwise stops it as 'stalled'. Subclasses that can check
+        the result (e.g. a residual) override this.
+        """
+        return True
+
+    def set_backend(self, backend):
+        """
+        Switches the number type mid-run, carrying the current iterate over.
+        """
+        self.backend = backend
+        self.g_func = self._compile(self.g_str)
+        self.previous_x = backend.convert(self.previous_x)
+
+    def attach_store(self, store):
+        """
+        Streams every step into a store.RunStore. The in-memory history is
+        then only a plotting tail of HISTORY_LIMIT points.
+        """
+        self.store = store
+        if store is not None and len(store) == 0:
+            store.extend(self.log.window())
+
+    @property
+    def records(self):
+        """
+        Step history as STEP_DTYPE records: the attached store, or the in-memory log.
+        """
+        return self.store if self.store is not None else self.log
+
+    def export(self, path, fmt=None, tolerance=None):
+        """
+        Writes the full step history to CSV, Parquet or .npy (see export.FORMATS),
+        with a converged column when a tolerance is given.
+        """
+        self.records.flush()
+        return export.export_history(self.records.window(), path, fmt, tolerance)
+
+    def format_value(self, value, decimals):
+        return self.backend.format(value, decimals)
+
     def step(self):
         """
         Performs one iteration step: x_{n+1} = g(x_n).
@@ -45,14 +266,11 @@ class IterationEngine:
 
         x_in = self.previous_x
         try:
-            x_out = self.g_func(x_in)
+            x_out = self._evaluate(x_in)
         except Exception as e:
             return {"error": str(e)}
 
-        if x_out != 0:
-            self.error = abs((x_out - x_in) / x_out) * 100
-        else:
-            self.error = 0.0
+        self.error = step_error(x_in, x_out)
 
         # p1 = (x_in, x_in) if self.step_count > 0 else (x_in, 0) 
         prev_pt = self.history[-1]
@@ -64,6 +282,10 @@ class IterationEngine:
         
         self.previous_x = x_out
         self.step_count += 1
+
+        self.records.append(self.step_count, x_in, x_out, self.error)
+        if self.store is not None and len(self.history) > 2 * HISTORY_LIMIT:
+            del self.history[:-HISTORY_LIMIT]
         
         return {
             "step": self.step_count,
@@ -73,32 +295,200 @@ class IterationEngine:
             "points": [prev_pt, pt_curve, pt_diag]
         }
 
-    def run_auto(self, tolerance, max_iter):
+    def run_auto(self, tolerance, max_iter, keep_results=True):
         """
         Runs the iteration automatically until error < tolerance or max_iter reached.
-        Returns a list of step data.
+        Also stops once the error sits at the precision's noise floor, since
+        further steps cannot get below a tolerance the number type can't resolve.
+        In 'adaptive' mode that point instead promotes the run to mpmath.
+        Returns a list of step data; the cause is left in self.stop_reason.
+        With keep_results=False only the last step is returned, for long runs
+        whose history goes to a RunStore instead.
+        With a budget set, a run that exceeds it stops with reason 'budget'
+        and can be continued by calling run_auto again.
         """
         if not self.g_func:
             return None
 
-        results = []
-        
-        while self.step_count < max_iter:
-            step_data = self.step()
-            if not step_data or "error" in step_data and isinstance(step_data["error"], str):
-                 results.append(step_data)
-                 break
-            
-            results.append(step_data)
-            
+        def check(step_data):
             if step_data["error"] < tolerance:
-                break
-                
+                return "tolerance" if self._accept(tolerance) else "stalled"
+            if step_data["error"] <= self.backend.noise_floor and not self._refine(tolerance):
+                return "precision"
+            return None
+
+        results = run_loop(self, max_iter, self.g_func.operations, check, keep_results)
+        if self.store is not None:
+            self.store.flush()
         return results
 
+    def run_cached(self, tolerance, max_iter, cache, keep_results=True):
+        """
+        run_auto through a cache.RunCache. A repeated configuration is served
+        from the cache; one with a larger max_iter resumes from the cached
+        last iterate. Only fresh, non-persisted runs that didn't fail are cached
+        (and only up to the cache's size limit).
+        max_iter is always the total step count here, also in subclasses
+        whose run_auto counts differently.
+        """
+        if self.step_count != 0 or self.store is not None or not self.g_func:
+            return self.run_auto(tolerance, max_iter, keep_results)
+
+        key = run_key(self.g_str, self.x0, tolerance, self.params, self.precision, self.digits)
+        hit = cache.get(key)
+        resolved = resolve(*hit, max_iter) if hit else None
+        if resolved is None:
+            results = IterationEngine.run_auto(self, tolerance, max_iter, keep_results)
+        else:
+            records, state, complete = resolved
+            self._restore(records, state)
+            results = self._replay(records[1:], keep_results)
+            if complete:
+                return results
+            more = IterationEngine.run_auto(self, tolerance, max_iter, keep_results)
+            results = results + more if keep_results else more
+
+        if self.stop_reason not in ("error", "budget"):
+            cache.put(key, self.log.window(), self.run_state())
+        return results
+
+    def run_state(self):
+        return {
+            "x": self.backend.to_text(self.previous_x),
+            "steps": self.step_count,
+            "error": self.error,
+            "stop_reason": self.stop_reason,
+            "backend": self.backend.name,
+            "backend_digits": self.backend.digits,
+        }
+
+    def _restore(self, records, state):
+        if state["backend"] == "mpmath" and self.backend.name != "mpmath":
+            self.set_backend(MPBackend(state["backend_digits"]))
+        self.previous_x = self.backend.from_text(state["x"])
+        self.step_count = int(state["steps"])
+        self.error = state["error"]
+        self.stop_reason = state["stop_reason"]
+        self.log = StepLog.from_records(records)
+        rows = records[records["step"] > 0]
+        if len(rows) == len(records):
+            # A history tail without the starting row: begin on the diagonal.
+            start = float(rows["x_in"][0]) if len(rows) else float(self.previous_x)
+            self.history = [(start, start)]
+        else:
+            self.history = [(self.history[0][0], 0)]
+        for x_in, x_out in zip(rows["x_in"].tolist(), rows["x_out"].tolist()):
+            self.history.append((x_in, x_out))
+            self.history.append((x_out, x_out))
+
+    def checkpoint(self):
+        """
+        Compact, JSON-serializable snapshot of the run: expression id and
+        source, the current iterate in lossless text form, counters and
+        history offset (rows written to self.records). Holds no history
+        itself; resume() picks it up from the RunStore when there is one.
+        """
+        if self.store is not None:
+            self.store.flush()
+        return {
+            "version": VERSION,
+            "expression_id": expression_id(self.g_str, self.params),
+            "expression": self.g_str,
+            "params": {k: str(v) for k, v in self.params.items()},
+            "x0": self.x0,
+            "precision": self.precision,
+            "digits": self.digits,
+            **self.run_state(),
+            "history_offset": len(self.records),
+            "store": self.store.path if self.store is not None else None,
+        }
+
+    def resume(self, checkpoint, store=None):
+        """
+        Continues a run from checkpoint(), in this or another process. The
+        iterate is restored bit for bit, so stepping on gives exactly the
+        steps the original run would have taken. store, a writable RunStore
+        of the run, is cut back to the checkpoint's history offset (dropping
+        steps written after it) and reattached; without one, the in-memory
+        history starts at the checkpoint.
+        """
+        success, msg = IterationEngine.initialize(self, checkpoint["expression"], checkpoint["x0"],
+                                                  checkpoint["precision"], checkpoint["digits"], checkpoint["params"])
+        if not success:
+            return False, msg
+        if expression_id(self.g_str, self.params) != checkpoint["expression_id"]:
+            return False, "Checkpoint does not match its expression."
+
+        if store is not None:
+            store.truncate(checkpoint["history_offset"])
+            tail = np.array(store.tail(HISTORY_LIMIT))
+        else:
+            tail = self.log.window()[:0]
+        self._restore(tail, checkpoint)
+        self.store = store
+        return True, f"Resumed at step {self.step_count}."
+
+    def _replay(self, rows, keep_results=True):
+        """
+        Step dicts, as step() returns them, rebuilt from stored rows.
+        """
+        if not keep_results:
+            rows = rows[-1:]
+        results = []
+        for step, x_in, x_out, error in rows.tolist():
+            prev_pt = self.history[2 * step - 2] if 2 * step - 2 < len(self.history) else (x_in, x_in)
+            results.append({
+                "step": step,
+                "x_in": x_in,
+                "x_out": x_out,
+                "error": error,
+                "points": [prev_pt, (x_in, x_out), (x_out, x_out)]
+            })
+        return results
+
+    def _refine(self, tolerance):
+        """
+        Promotes an adaptive run to just enough digits for `tolerance`.
+        Returns False when no further precision is available.
+        """
+        if self.precision != "adaptive" or isinstance(self.backend, MPBackend):
+            return False
+        digits = min(digits_for_tolerance(tolerance), self.digits)
+        if digits <= self.backend.digits:
+            return False
+        self.set_backend(MPBackend(digits))
+        return True
+
     def reset(self):
         self.g_func = None
         self.previous_x = 0.0
         self.history = []
         self.step_count = 0
         self.error = None
+        self.backend = get_backend()
+        self.stop_reason = None
+        self.params = {}
+        if self.store is not None:
+            self.store.close()
+        self.store = None
+        self.log = StepLog()
+
+
+def run_from_checkpoint(checkpoint, tolerance, max_iter, budget=None):
+    """
+    Continues a persisted run (one with a RunStore) from its checkpoint()
+    up to max_iter steps in all. Returns (checkpoint, last step data); the
+    store is written and closed before returning. Made for worker
+    processes: if the worker is killed, the caller resumes from the
+    checkpoint it passed in, which drops the partly written steps.
+    """
+    engine = IterationEngine()
+    engine.budget = budget
+    success, msg = engine.resume(checkpoint, RunStore.open(checkpoint["store"], writable=True))
+    if not success:
+        raise ValueError(msg)
+    try:
+        results = engine.run_auto(tolerance, max_iter, keep_results=False)
+        return engine.checkpoint(), results
+    finally:
+        engine.store.close()
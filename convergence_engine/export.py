@@ -0,0 +1,124 @@
+import io
+import os
+
+import numpy as np
+
+from .convergence import converged_mask
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_csv = None
+    pq = None
+
+FORMATS = ("csv", "parquet", "npy")
+CHUNK_ROWS = 1 << 18
+HEADERS = {"step": "Iteration", "x_in": "Previous X", "x_out": "Current X", "error": "Error (%)", "converged": "Converged"}
+
+
+def _chunks(records, chunk_rows):
+    for start in range(0, len(records), chunk_rows):
+        yield records[start:start + chunk_rows]
+
+
+def _columns(chunk, tolerance=None):
+    """
+    The chunk's columns by name, plus a converged flag column when a tolerance is given.
+    """
+    columns = {name: np.ascontiguousarray(chunk[name]) for name in chunk.dtype.names}
+    if tolerance is not None:
+        columns["converged"] = converged_mask(chunk["error"], chunk["step"], tolerance)
+    return columns
+
+
+def _batch(chunk, tolerance=None):
+    columns = _columns(chunk, tolerance)
+    return pa.record_batch([pa.array(column) for column in columns.values()],
+                           names=[HEADERS.get(name, name) for name in columns])
+
+
+def write_csv(records, sink, chunk_rows=CHUNK_ROWS, tolerance=None):
+    """
+    Streams a STEP_DTYPE array (e.g. a RunStore window) to a binary sink as
+    CSV, chunk by chunk.
+    Uses Arrow's C++ writer when pyarrow is installed, pandas otherwise;
+    either way no per-row Python formatting happens.
+    """
+    if pa is not None:
+        schema = _batch(records[:0], tolerance).schema
+        with pa_csv.CSVWriter(sink, schema) as writer:
+            for chunk in _chunks(records, chunk_rows):
+                writer.write_batch(_batch(chunk, tolerance))
+        return
+
+    import pandas as pd
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+    header = True
+    for chunk in _chunks(records, chunk_rows):
+        frame = pd.DataFrame(_columns(chunk, tolerance)).rename(columns=HEADERS)
+        frame.to_csv(text, index=False, header=header, float_format="%.17g")
+        header = False
+    text.flush()
+    text.detach()
+
+
+def write_parquet(records, sink, chunk_rows=CHUNK_ROWS, tolerance=None):
+    """
+    Writes one Parquet row group per chunk. Requires pyarrow.
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet export.")
+    schema = _batch(records[:0], tolerance).schema
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in _chunks(records, chunk_rows):
+            writer.write_batch(_batch(chunk, tolerance))
+
+
+def write_npy(records, sink, tolerance=None):
+    """
+    Writes the structured array as-is; memory-mapped stores are copied
+    straight from the mapping. A tolerance adds a boolean converged field.
+    """
+    if tolerance is not None:
+        flagged = np.empty(len(records), dtype=records.dtype.descr + [("converged", "?")])
+        for name in records.dtype.names:
+            flagged[name] = records[name]
+        flagged["converged"] = converged_mask(records["error"], records["step"], tolerance)
+        records = flagged
+    np.save(sink, records, allow_pickle=False)
+
+
+def export_history(records, path, fmt=None, tolerance=None):
+    """
+    Exports to `path` in fmt (one of FORMATS), taken from the extension if omitted.
+    With a tolerance, rows also get a converged flag.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    with open(path, "wb") as f:
+        export_to(records, f, fmt, tolerance)
+    return path
+
+
+def export_to(records, sink, fmt, tolerance=None):
+    if fmt == "csv":
+        write_csv(records, sink, tolerance=tolerance)
+    elif fmt == "parquet":
+        write_parquet(records, sink, tolerance=tolerance)
+    elif fmt == "npy":
+        write_npy(records, sink, tolerance)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_bytes(records, fmt, tolerance=None):
+    """
+    In-memory export, for download buttons.
+    """
+    buffer = io.BytesIO()
+    export_to(records, buffer, fmt, tolerance)
+    return buffer.getvalue()
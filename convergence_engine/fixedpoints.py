@@ -0,0 +1,91 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .core import compile_expression
+
+SCAN_POINTS = 4001
+BISECT_ITER = 80
+# |g'| within this of 1 is reported as neutral.
+NEUTRAL_BAND = 1e-6
+
+
+def _vectorized(g_expression, params=()):
+    g_func = compile_expression(g_expression, params=dict(params))
+
+    def evaluate(xs):
+        with np.errstate(all='ignore'):
+            try:
+                ys = np.broadcast_to(np.asarray(g_func(xs)), np.shape(xs))
+            except Exception:
+                ys = np.array([_point(g_func, v) for v in xs])
+            if np.iscomplexobj(ys):
+                ys = np.where(ys.imag == 0, ys.real, np.nan)
+            return np.array(ys, dtype=float)
+    return evaluate
+
+
+def _point(g_func, v):
+    try:
+        return complex(g_func(v))
+    except Exception:
+        return np.nan
+
+
+def classify(slope):
+    if not np.isfinite(slope):
+        return "neutral"
+    if abs(slope) < 1 - NEUTRAL_BAND:
+        return "attracting"
+    if abs(slope) > 1 + NEUTRAL_BAND:
+        return "repelling"
+    return "neutral"
+
+
+@lru_cache(maxsize=64)
+def find_fixed_points(g_expression, x_min, x_max, samples=SCAN_POINTS, params=()):
+    """
+    Every fixed point of g on [x_min, x_max].
+
+    g(x) - x is scanned on a grid for sign changes, all brackets are bisected
+    together as one vectorized solve, and each root is classified by |g'(x*)|.
+    Sign changes across poles are dropped, as is g(x) = x holding on most of
+    the interval. params is a tuple of (name, value) pairs so it can be part
+    of the cache key; results are cached per (expression, interval, params).
+    Returns a tuple of {"x", "slope", "kind"} dicts sorted by x.
+    """
+    evaluate = _vectorized(g_expression, params)
+    xs = np.linspace(x_min, x_max, samples)
+    hs = evaluate(xs) - xs
+
+    exact = hs == 0
+    if np.count_nonzero(exact) > samples // 2:
+        # g(x) = x on a whole stretch: a continuum, not isolated points.
+        return ()
+    roots = list(xs[exact])
+    with np.errstate(invalid='ignore'):
+        brackets = np.flatnonzero(np.sign(hs[:-1]) * np.sign(hs[1:]) < 0)
+    lo, hi = xs[brackets], xs[brackets + 1]
+    h_lo = hs[brackets]
+
+    for _ in range(BISECT_ITER):
+        mid = (lo + hi) / 2
+        h_mid = evaluate(mid) - mid
+        left = np.sign(h_mid) == np.sign(h_lo)
+        lo = np.where(left, mid, lo)
+        h_lo = np.where(left, h_mid, h_lo)
+        hi = np.where(left, hi, mid)
+
+    mid = (lo + hi) / 2
+    residual = np.abs(evaluate(mid) - mid)
+    roots.extend(mid[residual <= 1e-8 * (1 + np.abs(mid))])
+
+    if not roots:
+        return ()
+    roots = np.unique(np.array(roots, dtype=float))
+    h = 1e-6 * (1 + np.abs(roots))
+    slopes = (evaluate(roots + h) - evaluate(roots - h)) / (2 * h)
+    return tuple(
+        {"x": float(x), "slope": float(s), "kind": classify(s)}
+        for x, s in zip(roots, slopes)
+    )
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from .service import DEFAULT_PORT
+
+SAMPLE_JOBS = [
+    {"g": "cos(x)", "x0": 0.5, "tol": 1e-8},
+    {"g": "a*cos(x)", "x0": 1, "params": {"a": 0.9}, "tol": 1e-8},
+    {"f": "x**2 - 2", "x0": 1, "tol": 1e-10},
+    {"g": "sqrt(x + 1)", "x0": 1, "tol": 1e-8},
+    {"g": "3.8*x*(1 - x)", "x0": 0.1, "max_iter": 1000},
+]
+
+
+class Client:
+    """
+    Minimal keep-alive HTTP/1.1 client for the solver service.
+    """
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        """
+        Returns (status, body bytes); chunked bodies are reassembled.
+        """
+        await self._connect()
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while True:
+                size = int(await self.reader.readline(), 16)
+                parts.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            return status, b"".join(part[:-2] for part in parts)
+        return status, await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+    async def solve(self, job):
+        status, body = await self.request("POST", "/solve", job)
+        return status, json.loads(body)
+
+    async def batch(self, jobs, deadline=None):
+        payload = {"jobs": jobs}
+        if deadline is not None:
+            payload["deadline"] = deadline
+        status, body = await self.request("POST", "/batch", payload)
+        if status != 200:
+            return status, [json.loads(body)]
+        return status, [json.loads(line) for line in body.splitlines() if line]
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_load(host="127.0.0.1", port=DEFAULT_PORT, requests=1000, concurrency=32, batch_size=0, jobs=SAMPLE_JOBS):
+    """
+    Fires `requests` requests over `concurrency` keep-alive connections
+    (single /solve calls, or /batch calls of batch_size jobs) and returns
+    throughput and latency percentiles.
+    """
+    latencies = []
+    failures = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        client = Client(host, port)
+        try:
+            for i in counter:
+                started = time.perf_counter()
+                if batch_size:
+                    status, results = await client.batch([jobs[(i + k) % len(jobs)] for k in range(batch_size)])
+                    failures += status != 200 or sum(not r.get("ok") for r in results)
+                else:
+                    status, result = await client.solve(jobs[i % len(jobs)])
+                    failures += status != 200 or not result.get("ok")
+                latencies.append(time.perf_counter() - started)
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    lat = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "jobs": len(latencies) * (batch_size or 1),
+        "failures": int(failures),
+        "seconds": round(elapsed, 3),
+        "jobs_per_second": round(len(latencies) * (batch_size or 1) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 2) if len(lat) else None,
+        "p95_ms": round(float(np.percentile(lat, 95)), 2) if len(lat) else None,
+        "p99_ms": round(float(np.percentile(lat, 99)), 2) if len(lat) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the solver service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=0, help="Jobs per /batch request; 0 sends single /solve requests.")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency, args.batch_size)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
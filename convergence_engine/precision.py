@@ -0,0 +1,165 @@
+import math
+import types
+
+import numpy as np
+
+try:
+    import mpmath
+except ImportError:
+    mpmath = None
+
+BACKENDS = ("float64", "longdouble", "mpmath", "adaptive")
+DEFAULT_DIGITS = 30
+
+# Relative error (%) is considered noise once the step is within a few ulps.
+NOISE_ULPS = 4
+
+
+class NumberBackend:
+    """
+    Number type used by the engine: conversion, evaluation namespace and resolution.
+    """
+    name = "float64"
+    dtype = np.float64
+
+    @property
+    def eps(self):
+        return float(np.finfo(self.dtype).eps)
+
+    @property
+    def digits(self):
+        return int(np.finfo(self.dtype).precision)
+
+    @property
+    def noise_floor(self):
+        """
+        Smallest relative error (%) this precision can resolve.
+        """
+        return self.eps * NOISE_ULPS * 100
+
+    def resolves(self, tolerance):
+        return float(tolerance) > self.noise_floor
+
+    def convert(self, value):
+        if isinstance(value, str):
+            return self.dtype(value.strip())
+        return self.dtype(value)
+
+    def namespace(self):
+        context = {k: v for k, v in np.__dict__.items() if callable(v) or isinstance(v, (int, float, np.number))}
+        context['np'] = np
+        return context
+
+    def is_real(self, value):
+        return not np.iscomplexobj(value) and bool(np.isfinite(value))
+
+    def to_text(self, value):
+        """
+        Lossless text form of a value, for checkpoints: from_text(to_text(v)) == v bit for bit.
+        """
+        if self.dtype is np.float64:
+            return float(value).hex()
+        return np.format_float_scientific(self.dtype(value), unique=True)
+
+    def from_text(self, text):
+        if self.dtype is np.float64 and "p" in text:
+            return np.float64(float.fromhex(text))
+        return self.convert(text)
+
+    def format(self, value, decimals):
+        try:
+            return np.format_float_positional(self.dtype(value), precision=decimals, unique=False, fractional=True, trim='k')
+        except (TypeError, ValueError):
+            return str(value)
+
+
+class LongDoubleBackend(NumberBackend):
+    name = "longdouble"
+    dtype = np.longdouble
+
+
+class MPBackend(NumberBackend):
+    """
+    Arbitrary precision through mpmath, with its own context so the
+    working precision never leaks into other engines.
+    """
+    name = "mpmath"
+
+    _ALIASES = {
+        "cos": "cos", "sin": "sin", "tan": "tan",
+        "arccos": "acos", "arcsin": "asin", "arctan": "atan",
+        "acos": "acos", "asin": "asin", "atan": "atan",
+        "cosh": "cosh", "sinh": "sinh", "tanh": "tanh",
+        "sqrt": "sqrt", "exp": "exp", "log": "ln", "log10": "log10",
+        "abs": "fabs", "fabs": "fabs", "power": "power", "sign": "sign",
+        "floor": "floor", "ceil": "ceil",
+    }
+
+    def __init__(self, digits=DEFAULT_DIGITS):
+        if mpmath is None:
+            raise ImportError("mpmath is required for arbitrary precision.")
+        self.ctx = mpmath.MPContext()
+        self.ctx.dps = int(digits)
+
+    @property
+    def eps(self):
+        return float(self.ctx.eps)
+
+    @property
+    def digits(self):
+        return int(self.ctx.dps)
+
+    def convert(self, value):
+        if isinstance(value, str):
+            return self.ctx.mpf(value.strip())
+        return self.ctx.mpf(value)
+
+    def namespace(self):
+        context = {alias: getattr(self.ctx, name) for alias, name in self._ALIASES.items()}
+        context['pi'] = self.ctx.pi
+        context['e'] = self.ctx.e
+        context['np'] = types.SimpleNamespace(**context)
+        return context
+
+    def to_text(self, value):
+        sign, man, exp, bc = self.ctx.mpf(value)._mpf_
+        return f"mpf:{sign}:{man:x}:{exp}:{bc}"
+
+    def from_text(self, text):
+        if text.startswith("mpf:"):
+            sign, man, exp, bc = text[4:].split(":")
+            return self.ctx.make_mpf((int(sign), int(man, 16), int(exp), int(bc)))
+        return self.convert(text)
+
+    def is_real(self, value):
+        return isinstance(value, self.ctx.mpf) and bool(self.ctx.isfinite(value))
+
+    def format(self, value, decimals):
+        try:
+            return f"{self.ctx.mpf(value):.{decimals}f}"
+        except (TypeError, ValueError):
+            return str(value)
+
+
+def digits_for_tolerance(tolerance, guard=5):
+    """
+    Decimal digits needed to resolve a relative error (%) of `tolerance`.
+    """
+    tol = float(tolerance) / 100
+    if tol <= 0:
+        return DEFAULT_DIGITS
+    return max(int(math.ceil(-math.log10(tol))) + guard, 16)
+
+
+def get_backend(name="float64", digits=DEFAULT_DIGITS):
+    """
+    Builds the backend for a name in BACKENDS. 'adaptive' starts in float64;
+    the engine promotes it to mpmath when float64 runs out of digits.
+    """
+    if name in ("float64", "adaptive"):
+        return NumberBackend()
+    if name == "longdouble":
+        return LongDoubleBackend()
+    if name == "mpmath":
+        return MPBackend(digits)
+    raise ValueError(f"Unknown number backend: {name}")
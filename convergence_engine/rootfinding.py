@@ -0,0 +1,157 @@
+import re
+
+import numpy as np
+
+from .convergence import ZERO_ATOL
+from .core import IterationEngine, compile_expression
+
+PROBE_STEPS = 4
+# A run only counts as converged when x is within this many tolerances of the root.
+ROOT_SLACK = 10
+
+
+def _substitute(expression, replacement):
+    return re.sub(r'\bx\b', f"({replacement})", expression)
+
+
+def estimate_derivative(f_func, x0):
+    h = 1e-6 * (1 + abs(x0))
+    return (f_func(x0 + h) - f_func(x0 - h)) / (2 * h)
+
+
+def build_candidates(f_expression, x0, params=None):
+    """
+    Builds iteration maps g(x) whose fixed points are the roots of f(x) = 0.
+    Returns a list of (name, g_expression) pairs.
+    """
+    f = f"({f_expression})"
+    x0 = float(x0)
+    candidates = [("x - f(x)", f"x - {f}"), ("x + f(x)", f"x + {f}")]
+
+    try:
+        slope = float(estimate_derivative(compile_expression(f_expression, params=params), x0))
+    except Exception:
+        slope = 0.0
+    if np.isfinite(slope) and slope != 0:
+        candidates.append(("relaxation", f"x - ({1 / slope!r})*{f}"))
+
+    h = repr(1e-6 * (1 + abs(x0)))
+    f_plus = _substitute(f, f"x + {h}")
+    f_minus = _substitute(f, f"x - {h}")
+    candidates.append(("newton", f"x - {f}/(({f_plus} - {f_minus})/(2*{h}))"))
+
+    f_shift = _substitute(f, f"x + {f}")
+    candidates.append(("steffensen", f"x - {f}**2/({f_shift} - {f})"))
+    return candidates
+
+
+def contraction_rate(g_expression, f_expression, x0, steps=PROBE_STEPS, params=None):
+    """
+    Observed contraction of the residual, |f(x_k+1)| / |f(x_k)|, at the last
+    of the first few steps from x0. Returns inf for maps that fail, leave
+    the reals, or don't reduce |f| overall: a map that stalls away from a
+    root takes steps of size 0, but its residual stays put.
+    """
+    g_func = compile_expression(g_expression, params=params)
+    f_func = compile_expression(f_expression, params=params)
+    xs = [float(x0)]
+    with np.errstate(all='ignore'):
+        try:
+            for _ in range(steps + 1):
+                x_next = g_func(xs[-1])
+                if np.iscomplexobj(x_next) or not np.isfinite(x_next):
+                    return float("inf")
+                xs.append(float(x_next))
+            residuals = [abs(float(f_func(x))) for x in xs]
+        except Exception:
+            return float("inf")
+
+    if not np.all(np.isfinite(residuals)):
+        return float("inf")
+    if residuals[-1] == 0:
+        return 0.0
+    if residuals[-2] == 0 or not residuals[-1] < residuals[0]:
+        return float("inf")
+    rate = residuals[-1] / residuals[-2]
+    return rate if rate < 1 else float("inf")
+
+
+def choose_map(f_expression, x0, params=None):
+    """
+    Picks the candidate map whose residual |f| shrinks fastest from x0.
+    Returns (name, g_expression, rate); earlier (cheaper) candidates win
+    ties, and rate is inf when none of them reduces |f|.
+    """
+    best = None
+    for name, g_expression in build_candidates(f_expression, x0, params):
+        rate = contraction_rate(g_expression, f_expression, x0, params=params)
+        if best is None or rate < best[2]:
+            best = (name, g_expression, rate)
+    return best
+
+
+def root_error(f_func, x):
+    """
+    Estimated distance from x to the root, |f(x) / f'(x)| (one Newton step),
+    relative to |x| in %, like the engines' step error.
+    """
+    value = f_func(x)
+    if value == 0:
+        return 0.0
+    slope = estimate_derivative(f_func, x)
+    if slope == 0:
+        return float("inf")
+    distance = abs(value / slope)
+    scale = abs(x) if abs(x) > ZERO_ATOL else 1
+    return float(distance / scale * 100)
+
+
+class RootEngine(IterationEngine):
+    """
+    IterationEngine driven by f(x) = 0: the g(x) it iterates is generated
+    from f, so stepping, running and cobweb plotting work unchanged. A run
+    whose steps fall below tolerance away from a root of f stops with
+    stop_reason 'stalled' instead of 'tolerance'.
+    """
+    def __init__(self):
+        super().__init__()
+        self.f_str = ""
+        self.map_name = None
+        self.map_rate = None
+
+    def initialize(self, f_expression, x0, precision="float64", digits=None, params=None):
+        try:
+            name, g_expression, rate = choose_map(f_expression, x0, params)
+        except Exception as e:
+            return False, f"Error parsing function: {e}"
+        if not np.isfinite(rate):
+            return False, "No candidate iteration map converges from this initial guess."
+
+        kwargs = {} if digits is None else {"digits": digits}
+        success, msg = super().initialize(g_expression, x0, precision, params=params, **kwargs)
+        if success:
+            self.f_str = f_expression
+            self.map_name = name
+            self.map_rate = rate
+            msg = f"Using {name} map (contraction ≈ {rate:.3g})."
+        return success, msg
+
+    def _accept(self, tolerance):
+        f_func = compile_expression(self.f_str, self.backend, self.params)
+        with np.errstate(all='ignore'):
+            try:
+                error = root_error(f_func, self.previous_x)
+            except (ArithmeticError, ValueError):
+                return False
+        return error <= ROOT_SLACK * max(tolerance, self.backend.noise_floor)
+
+    def checkpoint(self):
+        return {**super().checkpoint(), "f": self.f_str, "map": self.map_name, "map_rate": None if self.map_rate is None else float(self.map_rate)}
+
+    def resume(self, checkpoint, store=None):
+        success, msg = super().resume(checkpoint, store)
+        if success:
+            self.f_str = checkpoint.get("f", "")
+            self.map_name = checkpoint.get("map")
+            self.map_rate = checkpoint.get("map_rate")
+        return success, msg
@@ -0,0 +1,156 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from .core import compile_expression
+
+TILES_PER_VIEW = 8
+INITIAL_POINTS = 8
+MAX_DEPTH = 10
+# Allowed midpoint deviation from the chord, as a fraction of tile width.
+CURVE_TOL = 0.01
+MAX_TILES = 512
+
+
+class CurveSampler:
+    """
+    Adaptive sampler for plotting y = g(x).
+
+    The x axis is split into tiles on a power-of-two grid, so the same tiles
+    come back after a pan or a zoom by a factor of two and are served from the
+    cache. Each tile starts coarse and bisects where the curve bends near the
+    visible band around y = x, where it crosses y = x, or where it leaves its
+    domain; sign-flipping jumps that never resolve (poles) are broken with NaN
+    so the line isn't drawn across them.
+    """
+    def __init__(self, g_expression, max_tiles=MAX_TILES, params=None):
+        self.g_str = g_expression
+        self.g_func = compile_expression(g_expression, params=params)
+        self.key = self.g_func.key()
+        self.tiles = OrderedDict()
+        self.max_tiles = max_tiles
+        self.evaluations = 0
+
+    def evaluate(self, xs):
+        """
+        Vectorized g over xs, falling back to a per-point loop for
+        expressions that don't broadcast. Non-real results become NaN.
+        """
+        self.evaluations += len(xs)
+        with np.errstate(all='ignore'):
+            try:
+                ys = np.broadcast_to(np.asarray(self.g_func(xs)), xs.shape)
+            except Exception:
+                ys = np.array([self._evaluate_point(v) for v in xs])
+            if np.iscomplexobj(ys):
+                ys = np.where(ys.imag == 0, ys.real, np.nan)
+            ys = np.array(ys, dtype=float)
+        ys[~np.isfinite(ys)] = np.nan
+        return ys
+
+    def _evaluate_point(self, v):
+        try:
+            r = self.g_func(v)
+            return complex(r) if np.iscomplexobj(r) else float(r)
+        except Exception:
+            return np.nan
+
+    @staticmethod
+    def tile_width(span):
+        span = span if span > 0 else 1.0
+        return 2.0 ** math.floor(math.log2(span / TILES_PER_VIEW))
+
+    def tile(self, width, k):
+        key = (width, k)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        data = self._refine(k * width, (k + 1) * width)
+        self.tiles[key] = data
+        if len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        return data
+
+    def _refine(self, a, b):
+        width = b - a
+        tol = width * CURVE_TOL
+        min_bend = width / 2 ** (MAX_DEPTH - 3)
+        min_cross = width / 2 ** (MAX_DEPTH - 2)
+        # Views are roughly square, so anything this far from y = x is off-screen.
+        band = 2 * TILES_PER_VIEW * width
+        xs = np.linspace(a, b, INITIAL_POINTS + 1)
+        ys = self.evaluate(xs)
+        active = np.ones(INITIAL_POINTS, dtype=bool)
+
+        for _ in range(MAX_DEPTH):
+            idx = np.flatnonzero(active)
+            if idx.size == 0:
+                break
+            x0, x1 = xs[idx], xs[idx + 1]
+            y0, y1 = ys[idx], ys[idx + 1]
+            xm = (x0 + x1) / 2
+            ym = self.evaluate(xm)
+
+            ok0, ok1, okm = np.isfinite(y0), np.isfinite(y1), np.isfinite(ym)
+            finite = ok0 & ok1 & okm
+            edge = ~finite & (ok0 | ok1 | okm)
+            with np.errstate(invalid='ignore'):
+                near = np.minimum(np.minimum(np.abs(y0 - x0), np.abs(y1 - x1)), np.abs(ym - xm)) < band
+                bend = finite & near & (np.abs(ym - (y0 + y1) / 2) > tol) & (x1 - x0 > min_bend)
+                cross = finite & (np.sign(y0 - x0) != np.sign(y1 - x1)) & (x1 - x0 > min_cross)
+            bad = edge | bend | cross
+
+            xs = np.insert(xs, idx + 1, xm)
+            ys = np.insert(ys, idx + 1, ym)
+            split = np.zeros(active.size, dtype=bool)
+            split[idx] = bad
+            active = np.insert(split, idx + 1, bad)
+
+        # Off-screen on both sides with a sign flip: a pole, not a curve.
+        with np.errstate(invalid='ignore'):
+            jump = (np.sign(ys[:-1]) != np.sign(ys[1:])) & (np.minimum(np.abs(ys[:-1] - xs[:-1]), np.abs(ys[1:] - xs[1:])) > band)
+        if jump.any():
+            cut = np.flatnonzero(jump) + 1
+            xs = np.insert(xs, cut, np.nan)
+            ys = np.insert(ys, cut, np.nan)
+
+        # One NaN is enough to break the line; drop the rest of each gap.
+        gap = np.isnan(ys)
+        keep = ~(gap[1:] & gap[:-1])
+        keep = np.concatenate([[True], keep])
+        return xs[keep], ys[keep]
+
+    def sample(self, x_min, x_max, span=None):
+        """
+        Curve over [x_min, x_max] at the resolution of a view `span` wide
+        (defaults to the range itself). Returns (xs, ys) arrays, NaN-separated.
+        """
+        width = self.tile_width(span if span is not None else x_max - x_min)
+        k_start, k_end = math.floor(x_min / width), math.ceil(x_max / width)
+        parts = [self.tile(width, k) for k in range(k_start, k_end)]
+        if not parts:
+            return np.array([]), np.array([])
+        xs = np.concatenate([p[0][:-1] for p in parts] + [parts[-1][0][-1:]])
+        ys = np.concatenate([p[1][:-1] for p in parts] + [parts[-1][1][-1:]])
+        return xs, ys
+
+    def sample_view(self, view_min, view_max, outer_min, outer_max, padding=1.0):
+        """
+        Fine samples across the view (padded by `padding` view widths on each
+        side) and coarse ones out to [outer_min, outer_max] so a pan still
+        shows the curve while the next render catches up.
+        """
+        span = view_max - view_min
+        near_min, near_max = view_min - padding * span, view_max + padding * span
+        xs, ys = self.sample(near_min, near_max, span)
+        if outer_min < near_min or outer_max > near_max:
+            far_x, far_y = self.sample(outer_min, outer_max)
+            # NaN breaks sit right after the point they follow.
+            at = far_x.copy()
+            breaks = np.flatnonzero(np.isnan(at))
+            at[breaks] = far_x[breaks - 1]
+            left, right = at < xs[0], at > xs[-1]
+            xs = np.concatenate([far_x[left], xs, far_x[right]])
+            ys = np.concatenate([far_y[left], ys, far_y[right]])
+        return xs, ys
@@ -0,0 +1,250 @@
+import ast
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import numpy as np
+
+# Compile-time limits on user expressions.
+MAX_NODES = 2000
+MAX_EXPONENT = 1e4
+# Non-ufunc NumPy callables that are safe (bounded, elementwise) in expressions.
+SAFE_FUNCTIONS = {"clip", "where", "round", "around", "sinc", "real", "imag", "angle",
+                  "float64", "longdouble", "float32"}
+_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call, ast.keyword,
+          ast.Name, ast.Attribute, ast.Constant, ast.Tuple, ast.expr_context,
+          ast.operator, ast.unaryop, ast.boolop, ast.cmpop)
+
+# Default run budget.
+EVAL_SECONDS = 1.0
+RUN_SECONDS = 60.0
+RUN_OPERATIONS = 10 ** 9
+POLL_SECONDS = 0.05
+# Workers come from a fork server where there is one: forked from a server
+# process, a worker would inherit its open client sockets and keep those
+# connections from closing.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class UnsafeExpressionError(ValueError):
+    pass
+
+
+class EvaluationTimeout(TimeoutError):
+    pass
+
+
+class WorkersBusy(EvaluationTimeout):
+    """
+    Every worker stayed busy with other jobs until the deadline.
+    """
+
+
+def _constant(node):
+    """
+    Float value of a constant subtree (e.g. 10**10**10 -> inf), or None when
+    it depends on x or a parameter. Only used to bound powers and shifts,
+    so overflow just means 'huge'.
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant(node.operand)
+        return None if value is None else (-value if isinstance(node.op, ast.USub) else value)
+    if isinstance(node, ast.BinOp):
+        left, right = _constant(node.left), _constant(node.right)
+        if left is None or right is None:
+            return None
+        try:
+            if isinstance(node.op, ast.Pow):
+                if abs(right) > MAX_EXPONENT:
+                    return float("inf")
+                return float(abs(left) ** right)
+            if isinstance(node.op, ast.LShift):
+                if abs(right) > MAX_EXPONENT:
+                    return float("inf")
+                return abs(left) * 2.0 ** right
+            if isinstance(node.op, ast.Add):
+                return left + right
+            if isinstance(node.op, ast.Sub):
+                return left - right
+            if isinstance(node.op, ast.Mult):
+                return left * right
+            if isinstance(node.op, ast.Div):
+                return left / right if right else float("inf")
+        except (OverflowError, ZeroDivisionError):
+            return float("inf")
+    return None
+
+
+def _unsafe_callable(name):
+    value = getattr(np, name, None)
+    return callable(value) and not isinstance(value, np.ufunc) and name not in SAFE_FUNCTIONS
+
+
+def validate_expression(source):
+    """
+    Rejects expressions that could run away or escape the evaluation
+    namespace before they are ever evaluated: huge constant exponents and
+    shifts (towers like x**10**10**10, whose exponent Python would compute
+    as an exact integer), constant powers and shifts beyond the float range
+    (like (10**9999)**9999, which Python would also compute exactly), dunder
+    and non-`np` attribute access, comprehensions and lambdas, NumPy
+    functions other than ufuncs and SAFE_FUNCTIONS (np.ones, np.load, ...),
+    and expressions over MAX_NODES nodes.
+    Returns the node count, the expression's cost per evaluation.
+    """
+    source = source.strip()
+    tree = ast.parse(source, mode="eval")
+    nodes = list(ast.walk(tree))
+    if len(nodes) > MAX_NODES:
+        raise UnsafeExpressionError(f"Expression is too large ({len(nodes)} nodes, at most {MAX_NODES}).")
+    for node in nodes:
+        if not isinstance(node, _NODES):
+            raise UnsafeExpressionError(f"'{type(node).__name__}' is not allowed in expressions.")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise UnsafeExpressionError("Only numeric constants are allowed in expressions.")
+        if isinstance(node, ast.Name) and (node.id.startswith("_") or _unsafe_callable(node.id)):
+            raise UnsafeExpressionError(f"'{node.id}' is not allowed in expressions.")
+        if isinstance(node, ast.Attribute):
+            if not (isinstance(node.value, ast.Name) and node.value.id == "np") or node.attr.startswith("_") \
+                    or _unsafe_callable(node.attr):
+                raise UnsafeExpressionError(f"'{ast.get_source_segment(source, node)}' is not allowed in expressions.")
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Pow, ast.LShift)):
+            exponent = _constant(node.right)
+            if exponent is not None and not abs(exponent) <= MAX_EXPONENT:
+                raise UnsafeExpressionError(f"Exponent in '{ast.get_source_segment(source, node)}' is too large "
+                                            f"(at most {MAX_EXPONENT:g}).")
+            value = _constant(node)
+            if value is not None and not np.isfinite(value):
+                raise UnsafeExpressionError(f"Constant '{ast.get_source_segment(source, node)}' is too large.")
+    return len(nodes)
+
+
+class Budget:
+    """
+    Limits on one run: wall time per evaluation and in total, and
+    operations (expression nodes evaluated). The engine stops a run that
+    exceeds any of them with stop_reason 'budget'.
+    """
+    def __init__(self, eval_seconds=EVAL_SECONDS, run_seconds=RUN_SECONDS, operations=RUN_OPERATIONS):
+        self.eval_seconds = eval_seconds
+        self.run_seconds = run_seconds
+        self.operations = operations
+
+    def exceeded(self, started, last, now, operations):
+        return now - last > self.eval_seconds or now - started > self.run_seconds or operations > self.operations
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, args = task
+        try:
+            conn.send(("ok", func(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class GuardedExecutor:
+    """
+    A few persistent worker processes for heavy jobs. Unlike a
+    ProcessPoolExecutor, a job that outlives its timeout, or is cancelled,
+    is stopped by killing its worker (a fresh one replaces it), so a
+    runaway evaluation never keeps holding a core.
+
+    run() blocks, so call it from a thread (e.g. loop.run_in_executor).
+    context is a multiprocessing start method (default: START_METHOD).
+    """
+    def __init__(self, workers=1, context=START_METHOD):
+        self.workers = workers
+        self.context = multiprocessing.get_context(context)
+        self.idle = queue.LifoQueue()
+        for _ in range(workers):
+            self.idle.put(None)  # Spawned on first use.
+        self.busy = set()
+        self.lock = threading.Lock()
+
+    def _spawn(self):
+        parent, child = self.context.Pipe()
+        process = self.context.Process(target=_worker_main, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        return process, parent
+
+    def _kill(self, worker):
+        process, conn = worker
+        process.kill()
+        process.join()
+        conn.close()
+
+    def run(self, func, *args, timeout=None, queue_timeout=None):
+        """
+        func(*args) in a worker. Raises EvaluationTimeout past `timeout`
+        seconds (waiting for a free worker included; WorkersBusy if none
+        became free, or none within queue_timeout), CancelledError after
+        cancel(), and RuntimeError for exceptions raised by func.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        wait = timeout
+        if queue_timeout is not None:
+            wait = queue_timeout if timeout is None else min(timeout, queue_timeout)
+        try:
+            worker = self.idle.get(timeout=wait)
+        except queue.Empty:
+            raise WorkersBusy("No worker became free in time; all are busy with other jobs.")
+        if worker is None:
+            worker = self._spawn()
+        process, conn = worker
+        with self.lock:
+            self.busy.add(worker)
+        try:
+            conn.send((func, args))
+            while not conn.poll(POLL_SECONDS):
+                if not process.is_alive():
+                    raise CancelledError("Job was cancelled.")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise EvaluationTimeout(f"Job exceeded its {timeout:g} s time limit.")
+            try:
+                status, value = conn.recv()
+            except EOFError:
+                raise CancelledError("Job was cancelled.")
+        except BaseException:
+            with self.lock:
+                self.busy.discard(worker)
+            self._kill(worker)
+            self.idle.put(None)
+            raise
+        with self.lock:
+            self.busy.discard(worker)
+        self.idle.put(worker)
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def cancel(self):
+        """
+        Kills every running job; their run() calls raise CancelledError.
+        """
+        with self.lock:
+            busy = list(self.busy)
+        for process, _ in busy:
+            process.kill()
+
+    def shutdown(self):
+        self.cancel()
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker[1].send(None)
+                worker[0].join()
@@ -0,0 +1,388 @@
+import asyncio
+import functools
+import json
+import os
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import numpy as np
+
+from .core import IterationEngine
+from .precision import BACKENDS, DEFAULT_DIGITS
+from .rootfinding import RootEngine
+from .sandbox import Budget, EvaluationTimeout, GuardedExecutor
+from .systems import SystemEngine, parse_vector
+
+DEFAULT_PORT = 8765
+MAX_BODY = 8 << 20
+# Per-job and per-batch iteration quotas.
+MAX_ITER = 1_000_000
+MAX_BATCH_JOBS = 10_000
+MAX_BATCH_ITER = 50_000_000
+MAX_DIGITS = 1000
+MAX_EQUATIONS = 100
+MAX_ANDERSON = 20
+DEFAULT_DEADLINE = 10.0
+MAX_DEADLINE = 120.0
+# Time a worker gets past the deadline to stop on its own before it is killed.
+GRACE_SECONDS = 1.0
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class JobError(ValueError):
+    """
+    A request the service refuses; carries the HTTP status to answer with.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_job(job):
+    """
+    Validates a job dict and fills in defaults:
+    {"g": "cos(x)"}, {"f": "x**2 - 2"} or a system {"G": ["cos(y)/2", "sin(x)/3"],
+    "x0": [0.5, 0.5], "anderson": 3}, plus optional "x0", "tol" (relative
+    error in %), "max_iter", "params", "precision", "digits" and "id".
+    """
+    if not isinstance(job, dict):
+        raise JobError("A job must be a JSON object.")
+    modes = [mode for mode in ("g", "f", "G") if mode in job]
+    if len(modes) != 1:
+        raise JobError("A job needs exactly one of 'g' (x = g(x)), 'f' (f(x) = 0) or 'G' (a system).")
+    mode = modes[0]
+    expression = job[mode]
+    if mode == "G":
+        if not isinstance(expression, list) or not 1 <= len(expression) <= MAX_EQUATIONS \
+                or not all(isinstance(e, str) and e.strip() for e in expression):
+            raise JobError(f"'G' must be a list of 1 to {MAX_EQUATIONS} expressions.")
+    elif not isinstance(expression, str) or not expression.strip():
+        raise JobError("The expression must be a non-empty string.")
+
+    try:
+        if mode == "G":
+            x0 = parse_vector(job.get("x0", [0.5] * len(expression)))
+            anderson = int(job.get("anderson", 0))
+        else:
+            x0 = str(job.get("x0", "0.5"))
+            float(x0)
+            anderson = 0
+        tol = float(job.get("tol", 1e-4))
+        max_iter = int(job.get("max_iter", 100))
+        digits = int(job.get("digits", DEFAULT_DIGITS))
+    except (TypeError, ValueError) as e:
+        raise JobError(f"Invalid number in job: {e}")
+    if tol <= 0:
+        raise JobError("'tol' must be positive.")
+    if not 1 <= digits <= MAX_DIGITS:
+        raise JobError(f"'digits' must be between 1 and {MAX_DIGITS}.", 413 if digits > MAX_DIGITS else 400)
+    if not 0 <= anderson <= MAX_ANDERSON:
+        raise JobError(f"'anderson' must be between 0 and {MAX_ANDERSON}.")
+    if not 1 <= max_iter <= MAX_ITER:
+        raise JobError(f"'max_iter' must be between 1 and {MAX_ITER:,}.", 413 if max_iter > MAX_ITER else 400)
+
+    precision = job.get("precision", "float64")
+    if precision not in BACKENDS:
+        raise JobError(f"'precision' must be one of {', '.join(BACKENDS)}.")
+    params = job.get("params") or {}
+    if not isinstance(params, dict) or not all(isinstance(k, str) and k.isidentifier() and k != "x" for k in params):
+        raise JobError("'params' must map names to values, e.g. {\"a\": 2}.")
+
+    return {
+        "id": job.get("id"), "mode": mode, "expression": expression,
+        "x0": x0, "tol": tol, "max_iter": max_iter, "precision": precision, "digits": digits,
+        "params": {k: str(v) for k, v in params.items()}, "anderson": anderson,
+    }
+
+
+def solve(job, deadline=None):
+    """
+    Runs one parsed job to completion and returns its result dict. An
+    absolute time.time() deadline becomes the run's sandbox.Budget, so the
+    engine stops itself with stop_reason "deadline", also inside a worker
+    process.
+    """
+    if job["mode"] == "G":
+        return solve_system(job, deadline)
+    engine = RootEngine() if job["mode"] == "f" else IterationEngine()
+    if deadline is not None:
+        engine.budget = Budget(run_seconds=deadline - time.time())
+    started = time.perf_counter()
+    success, msg = engine.initialize(job["expression"], job["x0"], job["precision"], job["digits"], job["params"])
+    if not success:
+        return {"id": job["id"], "ok": False, "error": msg}
+
+    results = engine.run_auto(job["tol"], job["max_iter"], keep_results=False)
+    if engine.stop_reason == "error":
+        return {"id": job["id"], "ok": False, "error": results[-1]["error"], "steps": engine.step_count}
+    if engine.stop_reason == "budget":
+        engine.stop_reason = "deadline"
+    result = {
+        "id": job["id"],
+        "ok": True,
+        "x": float(engine.previous_x),
+        "x_text": str(engine.previous_x),
+        "steps": engine.step_count,
+        "error": engine.error,
+        "converged": engine.stop_reason == "tolerance" and engine.backend.is_real(engine.previous_x),
+        "stop_reason": engine.stop_reason,
+        "backend": engine.backend.name,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
+    if job["mode"] == "f":
+        result["map"] = engine.map_name
+    return result
+
+
+def solve_system(job, deadline=None):
+    """
+    solve() for a "G" job, through systems.SystemEngine.
+    """
+    engine = SystemEngine()
+    if deadline is not None:
+        engine.budget = Budget(run_seconds=deadline - time.time())
+    started = time.perf_counter()
+    success, msg = engine.initialize(job["expression"], job["x0"], params=job["params"], precision=job["precision"],
+                                     anderson=job["anderson"])
+    if not success:
+        return {"id": job["id"], "ok": False, "error": msg}
+
+    results = engine.run_auto(job["tol"], job["max_iter"], keep_results=False)
+    if engine.stop_reason == "error":
+        return {"id": job["id"], "ok": False, "error": results[-1]["error"], "steps": engine.step_count}
+    with np.errstate(all='ignore'):
+        rate = engine.spectral_radius()
+    return {
+        "id": job["id"],
+        "ok": True,
+        "x": engine.previous_x.astype(float).tolist(),
+        "steps": engine.step_count,
+        "error": engine.error,
+        "residual": engine.residual,
+        "converged": engine.stop_reason == "tolerance",
+        "stop_reason": "deadline" if engine.stop_reason == "budget" else engine.stop_reason,
+        "spectral_radius": rate if np.isfinite(rate) else None,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
+
+
+def _solve_safely(job, deadline=None):
+    try:
+        result = solve(job, deadline)
+        # Results go out as strict JSON: no NaN or Infinity.
+        json.dumps(result, allow_nan=False)
+        return result
+    except Exception as e:
+        return {"id": job["id"], "ok": False, "error": str(e)}
+
+
+def _deadline_result(job):
+    return {"id": job["id"], "ok": False, "error": "deadline exceeded"}
+
+
+def _solve_chunk(jobs, deadline=None):
+    return [_solve_safely(job, deadline) for job in jobs]
+
+
+class SolverService:
+    """
+    Local HTTP/JSON front end to the engine, on plain asyncio streams.
+
+        GET  /health  -> {"status": "ok"}
+        POST /solve   job object -> result object
+        POST /batch   {"jobs": [...], "deadline": s} -> NDJSON, one result per
+                      line in completion order, each tagged with its "index"
+
+    Every job runs in a sandbox.GuardedExecutor worker process, which is
+    killed if the job outlives its deadline, so no evaluation can hold the
+    event loop (or the GIL) past it. Every request has a deadline
+    (DEFAULT_DEADLINE, capped at MAX_DEADLINE) and iteration quotas
+    (MAX_ITER per job, MAX_BATCH_ITER per batch). Connections are kept
+    alive between requests.
+    """
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.waiters = None
+        self.server = None
+
+    async def start(self):
+        self.executor = GuardedExecutor(self.workers)
+        # Threads that wait on the worker processes.
+        self.waiters = ThreadPoolExecutor(max_workers=4 * self.workers + 4)
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.waiters.shutdown(wait=False)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except JobError as e:
+                    # The body wasn't read, so the connection can't be reused.
+                    await self._send_json(writer, e.status, {"ok": False, "error": str(e)})
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    await self._route(method, path, body, writer)
+                except JobError as e:
+                    await self._send_json(writer, e.status, {"ok": False, "error": str(e)})
+                except Exception as e:
+                    await self._send_json(writer, 500, {"ok": False, "error": str(e)})
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise JobError("Malformed request line.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise JobError("Content-Length must be a number of bytes.")
+        if length < 0:
+            raise JobError("Content-Length must not be negative.")
+        if length > MAX_BODY:
+            raise JobError(f"Request body too large (at most {MAX_BODY:,} bytes).", 413)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _route(self, method, path, body, writer):
+        if path == "/health":
+            return await self._send_json(writer, 200, {"status": "ok", "workers": self.workers})
+        if path not in ("/solve", "/batch"):
+            raise JobError(f"No such endpoint: {path}", 404)
+        if method != "POST":
+            raise JobError(f"{path} only accepts POST.", 405)
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError as e:
+            raise JobError(f"Invalid JSON: {e}")
+
+        if path == "/solve":
+            job = parse_job(payload)
+            seconds = self._deadline(payload)
+            deadline = time.time() + seconds
+            results = await self._guarded(_solve_chunk, [job], deadline, seconds)
+            result = results[0] if results else _deadline_result(job)
+            return await self._send_json(writer, 200, result)
+        await self._batch(payload, writer)
+
+    async def _guarded(self, func, jobs, deadline, seconds):
+        """
+        func(jobs, deadline) in a worker process, killed GRACE_SECONDS past
+        the deadline; returns None if it had to be.
+        """
+        loop = asyncio.get_running_loop()
+        run = functools.partial(self.executor.run, func, jobs, deadline, timeout=seconds + GRACE_SECONDS)
+        try:
+            return await loop.run_in_executor(self.waiters, run)
+        except (EvaluationTimeout, CancelledError):
+            return None
+
+    def _deadline(self, payload):
+        try:
+            seconds = float(payload.get("deadline", DEFAULT_DEADLINE))
+        except (TypeError, ValueError):
+            raise JobError("'deadline' must be a number of seconds.")
+        if seconds <= 0:
+            raise JobError("'deadline' must be positive.")
+        return min(seconds, MAX_DEADLINE)
+
+    async def _batch(self, payload, writer):
+        if not isinstance(payload, dict) or not isinstance(payload.get("jobs"), list):
+            raise JobError("A batch is {\"jobs\": [...]}.")
+        if len(payload["jobs"]) > MAX_BATCH_JOBS:
+            raise JobError(f"A batch holds at most {MAX_BATCH_JOBS:,} jobs.", 413)
+        jobs = [parse_job(job) for job in payload["jobs"]]
+        if sum(job["max_iter"] for job in jobs) > MAX_BATCH_ITER:
+            raise JobError(f"A batch may request at most {MAX_BATCH_ITER:,} iterations in total.", 413)
+        seconds = self._deadline(payload)
+        deadline = time.time() + seconds
+
+        # A few chunks per worker: cheap jobs don't pay one round trip each,
+        # and results still stream back as chunks finish.
+        size = max(1, -(-len(jobs) // (4 * self.workers)))
+        tasks = {}
+        for start in range(0, len(jobs), size):
+            task = asyncio.ensure_future(self._guarded(_solve_chunk, jobs[start:start + size], deadline, seconds))
+            tasks[task] = range(start, min(start + size, len(jobs)))
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            lines = []
+            for task in done:
+                indices = tasks[task]
+                results = task.result() or [_deadline_result(jobs[index]) for index in indices]
+                lines.extend(json.dumps({"index": index, **result}, allow_nan=False) for index, result in zip(indices, results))
+            await self._send_chunk(writer, ("\n".join(lines) + "\n").encode())
+        await self._send_chunk(writer, b"")
+
+    async def _send_chunk(self, writer, data):
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload):
+        body = json.dumps(payload, allow_nan=False).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=None):
+    """
+    Runs the service until interrupted.
+    """
+    service = SolverService(host, port, workers)
+
+    async def main():
+        await service.start()
+        print(f"Serving on http://{service.host}:{service.port} with {service.workers} workers")
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
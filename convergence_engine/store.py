@@ -0,0 +1,181 @@
+import json
+import os
+
+import numpy as np
+
+STEP_DTYPE = np.dtype([("step", "<i8"), ("x_in", "<f8"), ("x_out", "<f8"), ("error", "<f8")])
+BUFFER_ROWS = 1 << 16
+GROW_ROWS = 1 << 20
+
+
+class StepLog:
+    """
+    In-memory counterpart of RunStore: the same append/window interface over
+    a STEP_DTYPE array that doubles as it fills.
+    """
+    def __init__(self, capacity=1024):
+        self.records = np.empty(capacity, dtype=STEP_DTYPE)
+        self.rows = 0
+
+    @classmethod
+    def from_records(cls, records):
+        log = cls(max(len(records), 1024))
+        log.records[:len(records)] = records
+        log.rows = len(records)
+        return log
+
+    def append(self, step, x_in, x_out, error):
+        if self.rows == len(self.records):
+            self.records = np.resize(self.records, 2 * len(self.records))
+        self.records[self.rows] = (step, float(x_in), float(x_out), float(error))
+        self.rows += 1
+
+    def flush(self):
+        pass
+
+    def __len__(self):
+        return self.rows
+
+    def window(self, start=0, stop=None):
+        stop = self.rows if stop is None else min(stop, self.rows)
+        return self.records[max(0, min(start, stop)):stop]
+
+    def tail(self, count):
+        return self.window(len(self) - count)
+
+    def close(self):
+        pass
+
+
+class RunStore:
+    """
+    Append-only on-disk history of a run.
+
+    Steps are buffered, then written into a memory-mapped file of STEP_DTYPE
+    records that grows in GROW_ROWS blocks, so a run of any length keeps a
+    constant RAM footprint. Metadata (row count, expression, x0, ...) lives in
+    a JSON sidecar next to the data file, and window() hands out views of the
+    mapped file rather than copies. Values are stored as float64 whatever the
+    engine's number backend.
+    """
+    def __init__(self, path, meta=None, mode="w+"):
+        self.path = path
+        self.meta_path = path + ".json"
+        self.meta = dict(meta or {})
+        self.rows = int(self.meta.get("rows", 0))
+        self.read_only = mode == "r"
+        self.capacity = 0
+        self.mmap = None
+        self.buffer = np.empty(BUFFER_ROWS, dtype=STEP_DTYPE)
+        self.pending = 0
+
+        if mode == "w+":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            open(path, "wb").close()
+            self.rows = 0
+            self._write_meta()
+        else:
+            self.capacity = os.path.getsize(path) // STEP_DTYPE.itemsize
+            self._map(mode)
+
+    @classmethod
+    def create(cls, path, **meta):
+        return cls(path, meta)
+
+    @classmethod
+    def open(cls, path, writable=False):
+        """
+        Reopens a stored run. Read-only unless writable=True, which resumes appending.
+        """
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        return cls(path, meta, "r+" if writable else "r")
+
+    def _map(self, mode):
+        if self.capacity:
+            self.mmap = np.memmap(self.path, dtype=STEP_DTYPE, mode=mode, shape=(self.capacity,))
+        else:
+            self.mmap = None
+
+    def _grow(self, needed):
+        if self.mmap is not None:
+            self.mmap.flush()
+        self.capacity = max(self.capacity + GROW_ROWS, needed)
+        with open(self.path, "r+b") as f:
+            f.truncate(self.capacity * STEP_DTYPE.itemsize)
+        self._map("r+")
+
+    def _write_meta(self):
+        self.meta["rows"] = self.rows
+        self.meta["dtype"] = [list(field) for field in STEP_DTYPE.descr]
+        with open(self.meta_path, "w") as f:
+            json.dump(self.meta, f)
+
+    def append(self, step, x_in, x_out, error):
+        if self.read_only:
+            raise IOError("Run store is open read-only.")
+        self.buffer[self.pending] = (step, float(x_in), float(x_out), float(error))
+        self.pending += 1
+        if self.pending == BUFFER_ROWS:
+            self.flush()
+
+    def extend(self, records):
+        """
+        Appends a STEP_DTYPE array (or anything convertible) in one copy.
+        """
+        self.flush()
+        records = np.asarray(records, dtype=STEP_DTYPE)
+        self._commit(records)
+        self._write_meta()
+
+    def _commit(self, records):
+        end = self.rows + len(records)
+        if end > self.capacity:
+            self._grow(end)
+        self.mmap[self.rows:end] = records
+        self.rows = end
+
+    def flush(self):
+        if self.pending:
+            self._commit(self.buffer[:self.pending])
+            self.pending = 0
+        if self.mmap is not None and not self.read_only:
+            self.mmap.flush()
+        if not self.read_only:
+            self._write_meta()
+
+    def truncate(self, rows):
+        """
+        Drops every row from `rows` on, e.g. steps written after the
+        checkpoint a run is resumed from.
+        """
+        if self.read_only:
+            raise IOError("Run store is open read-only.")
+        self.flush()
+        self.rows = min(int(rows), self.rows)
+        self._write_meta()
+
+    def __len__(self):
+        return self.rows + self.pending
+
+    def window(self, start=0, stop=None):
+        """
+        Rows [start, stop) as a view of the mapped file (pending steps are
+        flushed first). Columns are views too: window()["x_out"].
+        """
+        if self.pending:
+            self.flush()
+        stop = self.rows if stop is None else min(stop, self.rows)
+        start = max(0, min(start, stop))
+        if self.mmap is None:
+            return np.empty(0, dtype=STEP_DTYPE)
+        return self.mmap[start:stop]
+
+    def tail(self, count):
+        return self.window(len(self) - count)
+
+    def close(self):
+        self.flush()
+        self.mmap = None
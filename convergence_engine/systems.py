@@ -0,0 +1,259 @@
+import numpy as np
+
+from .core import parse_parameters, run_loop
+from .precision import get_backend
+from .sandbox import validate_expression
+
+ANDERSON_DEPTH = 0
+JACOBIAN_STEP = 1e-6
+
+
+def default_variables(n):
+    """
+    x, y, z, w for small systems; x1 ... xn beyond that.
+    """
+    if n <= 4:
+        return ("x", "y", "z", "w")[:n]
+    return tuple(f"x{i}" for i in range(1, n + 1))
+
+
+def parse_vector(text):
+    """
+    Parses "1, 0.5; 2" (or a sequence) into a list of value strings.
+    """
+    if isinstance(text, str):
+        parts = [p.strip() for p in text.replace(";", ",").split(",") if p.strip()]
+    else:
+        parts = [str(p) for p in text]
+    for part in parts:
+        float(part)
+    return parts
+
+
+class CompiledSystem:
+    """
+    G(x) = (g_1(x), ..., g_n(x)) compiled as one code object, so a step is a
+    single eval. Each variable may be a scalar or an array; with a (n, m)
+    array of m states, all m are evaluated at once (used for the Jacobian).
+    """
+    def __init__(self, expressions, variables=None, backend=None, params=None):
+        self.sources = [e.strip() for e in expressions]
+        if not self.sources:
+            raise ValueError("A system needs at least one expression.")
+        self.variables = tuple(variables or default_variables(len(self.sources)))
+        if len(self.variables) != len(self.sources):
+            raise ValueError(f"{len(self.sources)} expressions need {len(self.sources)} variables, got {len(self.variables)}.")
+        self.backend = backend or get_backend()
+        self.operations = sum(validate_expression(e) for e in self.sources)
+        self.code = compile("(" + ", ".join(f"({e})" for e in self.sources) + ",)", "<system>", "eval")
+        self.globals = {**self.backend.namespace(), "__builtins__": {}}
+        self.params = {k: self.backend.convert(v) for k, v in (params or {}).items()}
+        self.dtype = self.backend.dtype
+
+    @property
+    def size(self):
+        return len(self.sources)
+
+    def __call__(self, x):
+        """
+        G at x, an array of shape (n,) or (n, m). Returns the same shape.
+        """
+        local = dict(self.params)
+        local.update(zip(self.variables, x))
+        values = eval(self.code, self.globals, local)
+        if np.ndim(x) == 1:
+            return np.array(values, dtype=self.dtype)
+        # Components that don't depend on the states (e.g. constants) are broadcast.
+        return np.array(np.broadcast_arrays(*values), dtype=self.dtype)
+
+    def jacobian(self, x, h=JACOBIAN_STEP):
+        """
+        Central-difference Jacobian at x, from one vectorized evaluation of
+        the 2n shifted states.
+        """
+        n = self.size
+        step = h * (1 + np.abs(x))
+        shifts = np.concatenate([np.diag(step), -np.diag(step)], axis=1)
+        values = self(x[:, None] + shifts)
+        return (values[:, :n] - values[:, n:]) / (2 * step)
+
+
+def spectral_radius(jacobian):
+    """
+    Largest |eigenvalue|: below 1 near a fixed point means local convergence,
+    roughly by that factor per step.
+    """
+    return float(np.max(np.abs(np.linalg.eigvals(jacobian))))
+
+
+class SystemEngine:
+    """
+    Fixed-point iteration for systems x = G(x), x in R^n.
+
+    The same lifecycle as IterationEngine (initialize / step / run_auto /
+    reset, stop_reason), with the error measured as the relative residual
+    ||G(x) - x|| / ||G(x)|| (%), which for plain iteration is the relative
+    change per step. Iterates are kept in a (steps, n) array that doubles as it
+    fills. anderson=m > 0 mixes the last m steps (Anderson acceleration).
+    Scalar problems are better served by IterationEngine, which avoids the
+    array overhead.
+    """
+    def __init__(self):
+        self.anderson = ANDERSON_DEPTH
+        self.norm = np.inf
+        # A sandbox.Budget bounding the run; None is unbounded.
+        self.budget = None
+        self.reset()
+
+    def initialize(self, expressions, x0, variables=None, params=None, precision="float64", anderson=ANDERSON_DEPTH,
+                   norm=np.inf):
+        """
+        expressions: list of g_i (or one per line of text). x0: a sequence
+        or "1, 2". norm is passed to np.linalg.norm (np.inf, 2, 1).
+        """
+        try:
+            if isinstance(expressions, str):
+                expressions = [line for line in expressions.splitlines() if line.strip()]
+            if isinstance(params, str):
+                params = parse_parameters(params)
+            if precision not in ("float64", "longdouble"):
+                raise ValueError("Systems support the float64 and longdouble backends.")
+            system = CompiledSystem(expressions, variables, get_backend(precision), params)
+            x_start = np.array([system.backend.convert(v) for v in parse_vector(x0)], dtype=system.dtype)
+            if x_start.size != system.size:
+                raise ValueError(f"x0 has {x_start.size} values for {system.size} equations.")
+            with np.errstate(all='ignore'):
+                system(x_start)
+        except Exception as e:
+            return False, f"Error parsing system: {e}"
+
+        self.reset()
+        self.system = system
+        self.iterates = np.empty((64, system.size), dtype=system.dtype)
+        self.anderson = int(anderson)
+        self.norm = norm
+        self.previous_x = x_start
+        self._append(x_start, 0.0)
+        return True, "Initialization Successful."
+
+    def _append(self, x, error):
+        if self.rows == len(self.iterates):
+            self.iterates = np.resize(self.iterates, (2 * len(self.iterates), self.system.size))
+            self.errors = np.resize(self.errors, 2 * len(self.errors))
+        self.iterates[self.rows] = x
+        self.errors[self.rows] = error
+        self.rows += 1
+
+    @property
+    def trajectory(self):
+        """
+        Iterates so far, shape (steps + 1, n), as a view.
+        """
+        return self.iterates[:self.rows]
+
+    @property
+    def error_history(self):
+        return self.errors[:self.rows]
+
+    def _anderson(self, x, g):
+        """
+        Anderson (type II) update from the last `anderson` residuals.
+        """
+        self.residuals.append(g - x)
+        self.images.append(g)
+        if len(self.residuals) > self.anderson + 1:
+            del self.residuals[0], self.images[0]
+        if len(self.residuals) < 2:
+            return g
+        f = np.array(self.residuals, dtype=float).T
+        dF = np.diff(f, axis=1)
+        dG = np.diff(np.array(self.images, dtype=float).T, axis=1)
+        gamma = np.linalg.lstsq(dF, f[:, -1], rcond=None)[0]
+        return (g - dG @ gamma).astype(self.system.dtype)
+
+    def step(self):
+        """
+        One step x_{k+1} = G(x_k) (Anderson-mixed when enabled).
+        Returns details like IterationEngine.step, with array iterates.
+        """
+        if self.system is None:
+            return None
+        x_in = self.previous_x
+        try:
+            with np.errstate(all='ignore'):
+                g = self.system(x_in)
+                x_out = self._anderson(x_in, g) if self.anderson else g
+        except Exception as e:
+            return {"error": str(e)}
+        if not np.all(np.isfinite(x_out)):
+            return {"error": "Iterate left the reals or overflowed."}
+
+        # Measured on G(x) - x rather than on the step taken, so an
+        # accelerated run can't stall into a false convergence.
+        scale = self._norm(g)
+        self.residual = float(self._norm(g - x_in))
+        self.error = self.residual / float(scale) * 100 if scale else (0.0 if self.residual == 0 else 100.0)
+        self.previous_x = x_out
+        self.step_count += 1
+        self._append(x_out, self.error)
+        return {
+            "step": self.step_count,
+            "x_in": x_in,
+            "x_out": x_out,
+            "error": self.error,
+            "residual": self.residual,
+        }
+
+    def _norm(self, v):
+        if self.norm == np.inf:
+            return np.abs(v).max()
+        return np.linalg.norm(v, self.norm)
+
+    def run_auto(self, tolerance, max_iter, keep_results=True):
+        """
+        Steps until the relative change (%) drops below tolerance or
+        max_iter; the cause is left in self.stop_reason ('budget' when a
+        budget is set and used up).
+        """
+        if self.system is None:
+            return None
+        return run_loop(self, max_iter, self.system.operations,
+                        lambda step_data: "tolerance" if step_data["error"] < tolerance else None, keep_results)
+
+    def spectral_radius(self, x=None):
+        """
+        Estimated spectral radius of G's Jacobian at x (default: the current
+        iterate). Below 1: plain iteration converges locally at about that
+        rate; above 1 it diverges unless accelerated.
+        """
+        x = self.previous_x if x is None else np.asarray(x, dtype=self.system.dtype)
+        with np.errstate(all='ignore'):
+            return spectral_radius(self.system.jacobian(x))
+
+    def predict(self, tolerance, x=None):
+        """
+        (rate, steps): the spectral radius and the plain-iteration steps it
+        implies to shrink the current error below tolerance (None if it
+        does not converge).
+        """
+        rate = self.spectral_radius(x)
+        if self.error is None or not rate < 1:
+            return rate, None
+        if self.error < tolerance:
+            return rate, 0
+        if rate == 0:
+            return rate, 1
+        return rate, int(np.ceil(np.log(tolerance / self.error) / np.log(rate)))
+
+    def reset(self):
+        self.system = None
+        self.previous_x = None
+        self.step_count = 0
+        self.error = None
+        self.residual = None
+        self.stop_reason = None
+        self.iterates = np.empty((64, 1))
+        self.errors = np.empty(64)
+        self.rows = 0
+        self.residuals = []
+        self.images = []
@@ -5,6 +5,7 @@ try:
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
     from matplotlib.figure import Figure
     import tkinter.ttk as ttk
+    from tkinter import filedialog
 except ImportError:
     ctk = None
     tk = None
@@ -12,10 +13,17 @@ except ImportError:
     NavigationToolbar2Tk = None
     Figure = None
     ttk = None
+    filedialog = None
 
-import numpy as np
 import matplotlib.pyplot as plt
-from .core import IterationEngine
+from .core import IterationEngine, parse_parameters
+from .precision import BACKENDS, DEFAULT_DIGITS
+from .rootfinding import RootEngine
+from .sampling import CurveSampler
+from .fixedpoints import find_fixed_points
+from .cache import RunCache
+from .checkpoint import load_checkpoint, save_checkpoint
+from .sandbox import Budget
 
 COLOR_BG = "#1a1a1a"
 COLOR_ACCENT = "#1f6aa5"
@@ -24,6 +32,7 @@ COLOR_PLOT_BG = "#2b2b2b"
 COLOR_LINE_Y_X = "#00ff00"
 COLOR_LINE_G_X = "#00ffff"
 COLOR_COBWEB = "#ffff00"
+COLOR_FIXED_POINT = "#ff66cc"
 
 class ConvergenceApp(ctk.CTk if ctk else object):
 
@@ -35,6 +44,7 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         self.title("The Convergence Engine: Fixed Point Iteration")
         self.geometry("1200x800")
         self.engine = IterationEngine()
+        self.run_cache = RunCache()
         self.step_data_history = [] 
 
         self.grid_columnconfigure(0, weight=0) 
@@ -64,10 +74,19 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         self.frame_inputs = ctk.CTkFrame(self.sidebar, fg_color="transparent")
         self.frame_inputs.pack(padx=20, pady=10, fill="x")
         
-        ctk.CTkLabel(self.frame_inputs, text="Function g(x):", font=("Roboto", 14)).pack(anchor="w")
+        ctk.CTkLabel(self.frame_inputs, text="Mode:", font=("Roboto", 14)).pack(anchor="w")
+        self.combo_mode = ctk.CTkComboBox(self.frame_inputs, values=["x = g(x)", "f(x) = 0"])
+        self.combo_mode.set("x = g(x)")
+        self.combo_mode.pack(fill="x", pady=(0, 10))
+
+        ctk.CTkLabel(self.frame_inputs, text="Function g(x) or f(x):", font=("Roboto", 14)).pack(anchor="w")
         self.entry_g = ctk.CTkEntry(self.frame_inputs, placeholder_text="e.g., np.cos(x)")
         self.entry_g.pack(fill="x", pady=(0, 10))
         
+        ctk.CTkLabel(self.frame_inputs, text="Parameters:", font=("Roboto", 14)).pack(anchor="w")
+        self.entry_params = ctk.CTkEntry(self.frame_inputs, placeholder_text="e.g., a=2, b=0.5")
+        self.entry_params.pack(fill="x", pady=(0, 10))
+
         ctk.CTkLabel(self.frame_inputs, text="Initial Guess x0:", font=("Roboto", 14)).pack(anchor="w")
         self.entry_x0 = ctk.CTkEntry(self.frame_inputs, placeholder_text="e.g., 0.5")
         self.entry_x0.pack(fill="x", pady=(0, 10))
@@ -82,8 +101,18 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         self.entry_max_iter.insert(0, "100")
         self.entry_max_iter.pack(fill="x", pady=(0, 10))
 
+        ctk.CTkLabel(self.frame_inputs, text="Number Backend:", font=("Roboto", 14)).pack(anchor="w")
+        self.combo_precision = ctk.CTkComboBox(self.frame_inputs, values=list(BACKENDS))
+        self.combo_precision.set("float64")
+        self.combo_precision.pack(fill="x", pady=(0, 10))
+
+        ctk.CTkLabel(self.frame_inputs, text="Digits (mpmath / adaptive):", font=("Roboto", 14)).pack(anchor="w")
+        self.entry_digits = ctk.CTkEntry(self.frame_inputs, placeholder_text=f"e.g., {DEFAULT_DIGITS}")
+        self.entry_digits.insert(0, str(DEFAULT_DIGITS))
+        self.entry_digits.pack(fill="x", pady=(0, 10))
+
         ctk.CTkLabel(self.frame_inputs, text="Decimal Places:", font=("Roboto", 14)).pack(anchor="w")
-        self.combo_decimals = ctk.CTkComboBox(self.frame_inputs, values=[str(i) for i in range(21)])
+        self.combo_decimals = ctk.CTkComboBox(self.frame_inputs, values=[str(i) for i in range(51)])
         self.combo_decimals.set("6")
         self.combo_decimals.pack(fill="x", pady=(0, 10))
 
@@ -99,6 +128,15 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         self.btn_auto = ctk.CTkButton(self.frame_buttons, text="RUN AUTO", command=self.on_run_auto, state="disabled", fg_color="#2ecc71", hover_color="#27ae60")
         self.btn_auto.pack(fill="x", pady=5)
         
+        self.btn_export = ctk.CTkButton(self.frame_buttons, text="EXPORT HISTORY", command=self.on_export, state="disabled")
+        self.btn_export.pack(fill="x", pady=5)
+
+        self.btn_checkpoint = ctk.CTkButton(self.frame_buttons, text="SAVE CHECKPOINT", command=self.on_checkpoint, state="disabled")
+        self.btn_checkpoint.pack(fill="x", pady=5)
+
+        self.btn_resume = ctk.CTkButton(self.frame_buttons, text="RESUME CHECKPOINT", command=self.on_resume)
+        self.btn_resume.pack(fill="x", pady=5)
+
         self.btn_reset = ctk.CTkButton(self.frame_buttons, text="RESET", command=self.on_reset, fg_color="#c0392b", hover_color="#e74c3c")
         self.btn_reset.pack(fill="x", pady=5)
 
@@ -198,7 +236,7 @@ class ConvergenceApp(ctk.CTk if ctk else object):
 
     def update_hud(self, x_val, error_val):
         prec = self.get_precision()
-        self.lbl_x_val.configure(text=f"{x_val:.{prec}f}")
+        self.lbl_x_val.configure(text=self.engine.format_value(x_val, prec))
         if error_val is not None:
             self.lbl_error_val.configure(text=f"{error_val:.{prec}f}%")
             
@@ -230,8 +268,8 @@ class ConvergenceApp(ctk.CTk if ctk else object):
                 
             self.tree.insert("", "end", values=(
                 res["step"],
-                f"{res['x_in']:.{prec}f}",
-                f"{res['current_x'] if 'current_x' in res else res['x_out']:.{prec}f}", 
+                self.engine.format_value(res['x_in'], prec),
+                self.engine.format_value(res['current_x'] if 'current_x' in res else res['x_out'], prec),
                 f"{res['error']:.{prec}f}"
             ), tags=tags)
 
@@ -243,15 +281,32 @@ class ConvergenceApp(ctk.CTk if ctk else object):
             self.set_status("Please fill in Function and Initial Guess.", True)
             return
 
-        success, msg = self.engine.initialize(g_str, x0_str)
+        try:
+            digits = int(self.entry_digits.get())
+        except ValueError:
+            digits = DEFAULT_DIGITS
+
+        try:
+            params = parse_parameters(self.entry_params.get())
+        except ValueError as e:
+            self.set_status(str(e), True)
+            return
+
+        self.engine = RootEngine() if self.combo_mode.get() == "f(x) = 0" else IterationEngine()
+        self.engine.budget = Budget()
+        success, msg = self.engine.initialize(g_str, x0_str, self.combo_precision.get(), digits, params)
         if success:
-            self.set_status(f"Initialized: g(x)={g_str}, x0={x0_str}")
+            if isinstance(self.engine, RootEngine):
+                self.set_status(f"Initialized: f(x)={g_str}, x0={x0_str}. {msg}")
+            else:
+                self.set_status(f"Initialized: g(x)={g_str}, x0={x0_str}")
+            try:
+                if not self.engine.backend.resolves(self.entry_tol.get()):
+                    self.set_status(f"Initialized, but the tolerance is below {self.engine.backend.name} resolution.", True)
+            except ValueError:
+                pass
             
-            self.entry_g.configure(state="disabled")
-            self.entry_x0.configure(state="disabled")
-            self.btn_init.configure(state="disabled")
-            self.btn_step.configure(state="normal")
-            self.btn_auto.configure(state="normal")
+            self.set_controls_locked(True)
             
             # Initialize history with Iteration 0
             self.step_data_history = [{
@@ -275,19 +330,24 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         self.ax.grid(True, linestyle='--', alpha=0.3)
         self.ax.set_title(f"Fixed Point Iteration: x = {self.engine.g_str}", color=COLOR_TEXT)
         
-        x0 = self.engine.previous_x
+        x0 = float(self.engine.previous_x)
         span = 5
         x_min, x_max = x0 - span, x0 + span
         
-        x_vals = np.linspace(x_min, x_max, 400)
-        
-        self.ax.plot(x_vals, x_vals, color=COLOR_LINE_Y_X, label="y = x", linewidth=1.5)
+        self.ax.plot([x_min, x_max], [x_min, x_max], color=COLOR_LINE_Y_X, label="y = x", linewidth=1.5)
         
         try:
-            y_vals = [self.engine.g_func(x) for x in x_vals]
+            x_vals, y_vals = CurveSampler(self.engine.g_str, params=self.engine.params).sample(x_min, x_max)
             self.ax.plot(x_vals, y_vals, color=COLOR_LINE_G_X, label=f"y = {self.engine.g_str}", linewidth=1.5)
         except Exception as e:
             self.set_status(f"Plot Error: {e}", True)
+
+        try:
+            for p in find_fixed_points(self.engine.g_str, x_min, x_max, params=tuple(sorted(self.engine.params.items()))):
+                marker = {"attracting": "o", "repelling": "x"}.get(p["kind"], "s")
+                self.ax.plot(p["x"], p["x"], marker, color=COLOR_FIXED_POINT, markersize=7)
+        except Exception:
+            pass
         
         self.ax.legend()
         self.canvas.draw()
@@ -320,15 +380,15 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         self.update_table()
         
         points = result["points"]
-        xs = [p[0] for p in points]
-        ys = [p[1] for p in points]
+        xs = [float(p[0]) for p in points]
+        ys = [float(p[1]) for p in points]
         
         self.ax.plot(xs, ys, color=COLOR_COBWEB, linewidth=1, alpha=0.8)
-        self.ax.plot(x_out, x_out, 'o', color=COLOR_COBWEB, markersize=3)
+        self.ax.plot(float(x_out), float(x_out), 'o', color=COLOR_COBWEB, markersize=3)
         
         # Update Annotation
         prec = self.get_precision()
-        self.annot.set_text(f"Iter: {step_num}\nx: {x_out:.{prec}f}\nErr: {err:.{prec}f}%")
+        self.annot.set_text(f"Iter: {step_num}\nx: {self.engine.format_value(x_out, prec)}\nErr: {err:.{prec}f}%")
         
         self.canvas.draw()
 
@@ -342,7 +402,7 @@ class ConvergenceApp(ctk.CTk if ctk else object):
 
         self.set_status(f"Running auto... (Tol: {tol}, Max: {max_iter})")
         
-        results = self.engine.run_auto(tol, max_iter)
+        results = self.engine.run_cached(tol, max_iter, self.run_cache)
         
         if not results:
             self.set_status("No results generated.")
@@ -354,29 +414,108 @@ class ConvergenceApp(ctk.CTk if ctk else object):
         last_res = results[-1]
         self.update_hud(last_res['x_out'], last_res['error'])
         self.lbl_step_counter.configure(text=f"Iteration: {last_res['step']}") # Update step counter
-        self.set_status(f"Finished at Iteration {last_res['step']}.")
+        if self.engine.stop_reason == "budget":
+            self.set_status(f"Paused at Iteration {last_res['step']}: run budget used up. Press RUN AUTO to continue.", True)
+        elif self.engine.stop_reason == "stalled":
+            self.set_status(f"Stalled at Iteration {last_res['step']}: steps stopped shrinking away from a root of f(x).", True)
+        elif self.engine.stop_reason == "precision":
+            self.set_status(f"Stopped at Iteration {last_res['step']}: tolerance is below {self.engine.backend.name} precision.", True)
+        else:
+            self.set_status(f"Finished at Iteration {last_res['step']}.")
         
         for res in results:
             points = res["points"]
-            xs = [p[0] for p in points]
-            ys = [p[1] for p in points]
+            xs = [float(p[0]) for p in points]
+            ys = [float(p[1]) for p in points]
             self.ax.plot(xs, ys, color=COLOR_COBWEB, linewidth=1, alpha=0.8)
             
-        self.ax.plot(last_res['x_out'], last_res['x_out'], 'o', color=COLOR_COBWEB, markersize=3)
+        self.ax.plot(float(last_res['x_out']), float(last_res['x_out']), 'o', color=COLOR_COBWEB, markersize=3)
         self.canvas.draw()
         
         self.tabview.set("Data Table")
 
+    def on_export(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet"), ("NumPy", "*.npy")])
+        if not path:
+            return
+        try:
+            tol = float(self.entry_tol.get())
+        except ValueError:
+            tol = None
+        try:
+            self.engine.export(path, tolerance=tol)
+            self.set_status(f"Exported {len(self.engine.records)} rows to {path}.")
+        except Exception as e:
+            self.set_status(f"Export Error: {e}", True)
+
+    def on_checkpoint(self):
+        path = filedialog.asksaveasfilename(defaultextension=".ckpt", filetypes=[("Checkpoint", "*.ckpt")])
+        if not path:
+            return
+        try:
+            save_checkpoint(self.engine.checkpoint(), path)
+            self.set_status(f"Checkpoint saved at Iteration {self.engine.step_count}.")
+        except Exception as e:
+            self.set_status(f"Checkpoint Error: {e}", True)
+
+    def on_resume(self):
+        path = filedialog.askopenfilename(filetypes=[("Checkpoint", "*.ckpt")])
+        if not path:
+            return
+        try:
+            checkpoint = load_checkpoint(path)
+            engine = RootEngine() if checkpoint.get("f") else IterationEngine()
+            engine.budget = Budget()
+            success, msg = engine.resume(checkpoint)
+        except Exception as e:
+            success, msg = False, f"Checkpoint Error: {e}"
+        if not success:
+            self.set_status(msg, True)
+            return
+
+        self.engine = engine
+        self.entry_g.configure(state="normal")
+        self.entry_g.delete(0, "end")
+        self.entry_g.insert(0, checkpoint.get("f") or checkpoint["expression"])
+        self.entry_x0.configure(state="normal")
+        self.entry_x0.delete(0, "end")
+        self.entry_x0.insert(0, checkpoint["x0"])
+        self.combo_mode.configure(state="normal")
+        self.combo_mode.set("f(x) = 0" if isinstance(engine, RootEngine) else "x = g(x)")
+        self.set_controls_locked(True)
+
+        self.step_data_history = [{
+            "step": engine.step_count,
+            "x_in": engine.previous_x,
+            "x_out": engine.previous_x,
+            "error": engine.error or 0.0
+        }]
+        self.update_hud(engine.previous_x, engine.error)
+        self.lbl_step_counter.configure(text=f"Iteration: {engine.step_count}")
+        self.update_table()
+        self.plot_base_functions()
+        self.set_status(msg)
+        self.tabview.set("Visualization")
+
+    def set_controls_locked(self, locked):
+        """
+        Locks the run inputs while a run is loaded, or frees them after a reset.
+        """
+        inputs = "disabled" if locked else "normal"
+        actions = "normal" if locked else "disabled"
+        for widget in (self.entry_g, self.entry_x0, self.entry_params, self.combo_mode, self.btn_init):
+            widget.configure(state=inputs)
+        for widget in (self.btn_step, self.btn_auto, self.btn_export, self.btn_checkpoint):
+            widget.configure(state=actions)
+
     def on_reset(self):
         self.engine.reset()
         self.step_data_history = []
         self.set_status("Reset complete.")
         
-        self.entry_g.configure(state="normal")
-        self.entry_x0.configure(state="normal")
-        self.btn_init.configure(state="normal")
-        self.btn_step.configure(state="disabled")
-        self.btn_auto.configure(state="disabled")
+        self.set_controls_locked(False)
         
         self.ax.clear()
         self.ax.grid(True, linestyle='--', alpha=0.3)
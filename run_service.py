@@ -0,0 +1,11 @@
+import argparse
+
+from convergence_engine.service import DEFAULT_PORT, serve
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON fixed-point solver service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Processes for batch jobs (default: CPU count).")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)